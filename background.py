@@ -0,0 +1,44 @@
+"""Downsampled copies of the uploaded background image for the preview."""
+from PIL import Image
+
+# Stop halving once the longest side of a level is below this
+PYRAMID_MIN_SIZE = 256
+
+
+class BackgroundPyramid:
+    """Image pyramid built once when a background is uploaded.
+
+    Level 0 is the original image and every further level halves it with
+    a box filter. Resizes start from the smallest level that is still at
+    least as large as the target, so even a big scan is only ever
+    resampled from at most twice the canvas size.
+    """
+
+    def __init__(self, image):
+        if image.mode not in ('RGB', 'RGBA', 'L'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        else:
+            image.load()
+        self.levels = [image]
+        while max(image.size) // 2 >= PYRAMID_MIN_SIZE:
+            image = image.reduce(2)
+            self.levels.append(image)
+
+    @property
+    def size(self):
+        return self.levels[0].size
+
+    def level_for(self, size):
+        """Smallest level that still covers the target size"""
+        width, height = size
+        for level in reversed(self.levels):
+            if level.width >= width and level.height >= height:
+                return level
+        return self.levels[0]
+
+    def fast(self, size):
+        """Cheap approximate resize for immediate display"""
+        return self.level_for(size).resize(size, Image.Resampling.BILINEAR)
+
+    def high_quality(self, size):
+        return self.level_for(size).resize(size, Image.Resampling.LANCZOS)
@@ -0,0 +1,314 @@
+"""Benchmarks for the numbering, preview and export hot paths.
+
+Every case runs in a fresh process so the peak RSS it reports is its own
+(render and export pool workers included). Results are stored as JSON so
+runs can be compared across versions:
+
+    python benchmarks.py -o before.json
+    python benchmarks.py --compare before.json -o after.json
+    python benchmarks.py --quick --only pdf,images
+
+Preview and start-up cases need a display; on Linux without one they
+start Xvfb if it is installed and are skipped otherwise.
+"""
+import argparse
+import atexit
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from numbering_engine import NumberingJob, new_head, number_for_page, number_sequence
+from image_export import ImageExportWorker
+
+# Display number used for the Xvfb server started by preview cases
+XVFB_DISPLAY = ":97"
+
+
+class SkipBenchmark(Exception):
+    pass
+
+
+def peak_rss_bytes():
+    """Peak resident memory of this process and its finished children"""
+    if resource is None:
+        return None
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def output_bytes(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def make_heads(count, symbols=None):
+    """Heads spread over an A4 page; symbols is None, 'qr', 'barcode' or 'mixed'"""
+    heads = []
+    for i in range(count):
+        head = new_head(i)
+        head['x'] = 40 + (i % 5) * 110
+        head['y'] = 60 + (i // 5) * 75
+        head['show_qr'] = symbols == 'qr' or (symbols == 'mixed' and i % 2 == 0)
+        head['show_barcode'] = symbols == 'barcode' or (symbols == 'mixed' and i % 2 == 1)
+        heads.append(head)
+    return heads
+
+
+def symbol_count(heads, pages):
+    return pages * sum(int(head['show_qr']) + int(head['show_barcode']) for head in heads)
+
+
+def bench_number_for_page(calls):
+    start = time.perf_counter()
+    for page in range(1, calls + 1):
+        number_for_page(page, 1, 1, 3, calls, 'Descending')
+    seconds = time.perf_counter() - start
+    return {'calls': calls, 'seconds': seconds, 'pages_per_s': calls / seconds}
+
+
+def bench_sequence(pages):
+    start = time.perf_counter()
+    number_sequence(pages, 1, 1, 3, 'Descending')
+    seconds = time.perf_counter() - start
+    return {'pages': pages, 'seconds': seconds, 'pages_per_s': pages / seconds}
+
+
+def bench_export_pdf(pages, heads, symbols=None):
+    job = NumberingJob(make_heads(heads, symbols), {'total': pages})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.pdf")
+        start = time.perf_counter()
+        job.render_pdf(path, workers=None)
+        seconds = time.perf_counter() - start
+        size = output_bytes(path)
+    result = {'pages': pages, 'heads': heads, 'seconds': seconds, 'pages_per_s': pages / seconds, 'output_bytes': size}
+    if symbols:
+        result['codes_per_s'] = symbol_count(job.heads, pages) / seconds
+    return result
+
+
+def bench_export_images(pages, heads, output_format=None):
+    job = NumberingJob(make_heads(heads, 'mixed'), {'total': pages})
+    with tempfile.TemporaryDirectory() as tmp:
+        target = os.path.join(tmp, f"images.{output_format}") if output_format in ('zip', 'tar', 'tiff') else tmp
+        worker = ImageExportWorker(job, target, output_format=output_format)
+        start = time.perf_counter()
+        worker.start()
+        worker.thread.join()
+        seconds = time.perf_counter() - start
+        size = output_bytes(tmp)
+    message = None
+    while not worker.messages.empty():
+        message = worker.messages.get()
+    if message is None or message[0] != 'done':
+        raise RuntimeError(f"export did not finish: {message}")
+    codes = message[1] + message[2]
+    return {'pages': pages, 'heads': heads, 'codes': codes, 'seconds': seconds,
+            'pages_per_s': pages / seconds, 'codes_per_s': codes / seconds, 'output_bytes': size}
+
+
+def ensure_display():
+    """Make sure Tk can open a window, starting Xvfb on a headless Linux box"""
+    if not sys.platform.startswith("linux") or os.environ.get("DISPLAY"):
+        return
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        raise SkipBenchmark("no display and Xvfb is not installed")
+    server = subprocess.Popen([xvfb, XVFB_DISPLAY, "-screen", "0", "1920x1080x24", "-nolisten", "tcp"],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    atexit.register(server.terminate)
+    time.sleep(1)
+    if server.poll() is not None:
+        raise SkipBenchmark("Xvfb failed to start")
+    os.environ["DISPLAY"] = XVFB_DISPLAY
+
+
+def bench_preview(heads, symbols=None, pages=50):
+    """Redraw the preview for consecutive pages in a real Tk window"""
+    ensure_display()
+    from ctkinter import NumberingSystemApp
+
+    app = NumberingSystemApp()
+    try:
+        app.numbering_heads = make_heads(heads, symbols)
+        app.update_heads_list()
+        app.total_pages_var.set(str(pages))
+        app.root.update()
+        start = time.perf_counter()
+        for page in range(1, pages + 1):
+            app.current_page = page
+            app.update_preview()
+            app.root.update_idletasks()
+        seconds = time.perf_counter() - start
+    finally:
+        app.root.destroy()
+    result = {'pages': pages, 'heads': heads, 'seconds': seconds, 'pages_per_s': pages / seconds}
+    if symbols:
+        result['codes_per_s'] = symbol_count(make_heads(heads, symbols), pages) / seconds
+    return result
+
+
+def bench_startup(runs=5):
+    """Launch the GUI with --startup-time; median of several cold starts"""
+    ensure_display()
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ctkinter.py")
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, script, "--startup-time"], capture_output=True, text=True, timeout=120)
+        process_s = time.perf_counter() - start
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"exit code {result.returncode}")
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        sample['process_s'] = process_s
+        samples.append(sample)
+    samples.sort(key=lambda sample: sample['first_paint_s'])
+    median = samples[len(samples) // 2]
+    return {'runs': runs, 'seconds': median['first_paint_s'], 'imports_s': median['imports_s'], 'window_s': median['window_s'],
+            'warm_up_s': median['warm_up_s'], 'process_s': median['process_s'], 'deferred_modules': median['deferred_modules']}
+
+
+# name: (group, function, arguments, part of --quick)
+CASES = {
+    'startup': ('startup', bench_startup, (5,), True),
+    'number_for_page_100k': ('numbering', bench_number_for_page, (100000,), True),
+    'sequence_1m': ('numbering', bench_sequence, (1000000,), True),
+    'preview_1_text': ('preview', bench_preview, (1, None), True),
+    'preview_10_mixed': ('preview', bench_preview, (10, 'mixed'), True),
+    'preview_50_mixed': ('preview', bench_preview, (50, 'mixed'), False),
+    'pdf_1k_text': ('pdf', bench_export_pdf, (1000, 2), True),
+    'pdf_10k_text': ('pdf', bench_export_pdf, (10000, 2), False),
+    'pdf_100k_text': ('pdf', bench_export_pdf, (100000, 2), False),
+    'pdf_1k_mixed': ('pdf', bench_export_pdf, (1000, 2, 'mixed'), True),
+    'pdf_10k_mixed': ('pdf', bench_export_pdf, (10000, 2, 'mixed'), False),
+    'images_1k_folder': ('images', bench_export_images, (1000, 2), False),
+    'images_1k_zip': ('images', bench_export_images, (1000, 2, 'zip'), False),
+    'images_1k_sheets': ('images', bench_export_images, (1000, 2, 'sheets'), False),
+    'images_200_folder': ('images', bench_export_images, (200, 2), True),
+}
+
+
+def _run_case(name, results):
+    _, function, args, _ = CASES[name]
+    try:
+        result = function(*args)
+    except SkipBenchmark as e:
+        results.put({'skipped': str(e)})
+        return
+    except Exception as e:
+        results.put({'error': f"{type(e).__name__}: {e}"})
+        return
+    result['peak_rss_bytes'] = peak_rss_bytes()
+    results.put(result)
+
+
+def run_case(name):
+    """Run one case in a fresh process and return its result dict"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_run_case, args=(name, results))
+    process.start()
+    process.join()
+    if results.empty():
+        return {'error': f"benchmark process exited with code {process.exitcode}"}
+    return results.get()
+
+
+def git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def format_result(name, result):
+    if 'skipped' in result:
+        return f"{name:<22} skipped: {result['skipped']}"
+    if 'error' in result:
+        return f"{name:<22} error: {result['error']}"
+    if 'pages_per_s' not in result:
+        return f"{name:<22} {result['seconds'] * 1000:>12,.0f} ms to first paint  (imports {result['imports_s'] * 1000:,.0f} ms, warm-up {result['warm_up_s'] * 1000:,.0f} ms)"
+    parts = [f"{result['pages_per_s']:>12,.0f} pages/s"]
+    if 'codes_per_s' in result:
+        parts.append(f"{result['codes_per_s']:>9,.0f} codes/s")
+    if result.get('peak_rss_bytes'):
+        parts.append(f"peak {result['peak_rss_bytes'] / 1048576:,.1f} MB")
+    if 'output_bytes' in result:
+        parts.append(f"output {result['output_bytes'] / 1048576:,.1f} MB")
+    return f"{name:<22} " + "  ".join(parts)
+
+
+def compare(previous, current):
+    """Print the throughput change of every case present in both runs"""
+    print(f"\nCompared with {previous.get('revision') or 'previous run'} ({previous.get('created')}):")
+    for name, result in current['results'].items():
+        before = previous.get('results', {}).get(name, {})
+        if 'pages_per_s' in result and 'pages_per_s' in before:
+            print(f"{name:<22} {result['pages_per_s'] / before['pages_per_s']:>6.2f}x pages/s")
+        elif 'seconds' in result and 'seconds' in before:
+            print(f"{name:<22} {before['seconds'] / result['seconds']:>6.2f}x faster")
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Benchmark numbering, preview and export performance.")
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="JSON file to store the results in")
+    parser.add_argument("--only", help="comma-separated groups or case names (startup, numbering, preview, pdf, images)")
+    parser.add_argument("--quick", action="store_true", help="run only the small cases")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--list", action="store_true", help="list the cases and exit")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.list:
+        for name, (group, _, case_args, quick) in CASES.items():
+            print(f"{name:<22} {group:<10} {case_args}{' (quick)' if quick else ''}")
+        return 0
+
+    selected = set(args.only.split(",")) if args.only else None
+    names = [name for name, (group, _, _, quick) in CASES.items()
+             if (selected is None or group in selected or name in selected) and (quick or not args.quick)]
+
+    report = {
+        'created': datetime.now().isoformat(timespec="seconds"),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': {}
+    }
+    for name in names:
+        result = run_case(name)
+        report['results'][name] = result
+        print(format_result(name, result), flush=True)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
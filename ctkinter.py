@@ -1,25 +1,30 @@
+import time
+# Wall clock when the module started loading, for --startup-time
+IMPORT_STARTED = time.perf_counter()
+
+import argparse
+import importlib
+import json
+import sys
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, colorchooser
 import math
-import qrcode
 from PIL import Image, ImageTk, ImageDraw, ImageFont
-from barcode import Code128, Code39, EAN13, EAN8, UPCA
-from barcode.writer import ImageWriter
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4, A3, letter, legal
-from reportlab.lib.units import mm
-from reportlab.lib.colors import HexColor
-import io
 import os
 import platform
 import subprocess
-import tempfile
-import uuid
 import shutil
-from pathlib import Path
+import queue
+from collections import OrderedDict
 import threading
-import time
+from symbology import SymbolCache, SYMBOL_CACHE_BYTES
+from printing import PrintWorker, SpoolWorker, PdfExportWorker, PrinterRegistry
+from preferences import load_preferences, save_preferences
+from background import BackgroundPyramid
+from profiling import profiler, span
+from project import load_project, save_project, PROJECT_EXTENSION, BINARY_PROJECT_EXTENSION
+from numbering_engine import NumberingJob, PAPER_SIZES, new_head, format_head_text, number_for_page, parse_int
 
 # --- Configuration & Global Variables ---
 ctk.set_appearance_mode("System")
@@ -40,6 +45,52 @@ RULER_BORDER_COLOR = "#ccc"
 RULER_TICK_COLOR = "#666"
 BLACK_COLOR = "#000000"
 
+# Ruler tick layout per unit: (mm per unit, minor step, major interval, label interval, label suffix)
+RULER_UNITS = {
+    'mm': (1, 1, 5, 10, 'mm'),
+    'cm': (10, 1, 5, 10, 'cm'),
+    'inch': (25.4, 0.25, 1, 2, '"')
+}
+
+# Thickness of the rulers and pixel size of their labels (Arial 8pt at 96 dpi)
+RULER_SIZE = 30
+RULER_FONT_PX = 11
+
+# Quiet time after the last keystroke before the preview is redrawn
+PREVIEW_DEBOUNCE_MS = 120
+
+# Quiet period after a canvas resize before the background is resampled with LANCZOS
+BACKGROUND_REFINE_MS = 150
+
+# Canvas sizes whose resized background PhotoImage is kept
+BACKGROUND_PHOTO_CACHE = 4
+
+# How often progress windows check their worker's queue
+PROGRESS_POLL_MS = 100
+
+# Print menu choices and the pages per spooled PDF (0 = one job)
+SPOOL_OPTIONS = {
+    "Single Job": 0,
+    "100-Page Chunks": 100,
+    "500-Page Chunks": 500,
+    "1000-Page Chunks": 1000
+}
+
+# Printer list refresh interval and the label of the system default queue
+PRINTER_REFRESH_MS = 5 * 60 * 1000
+DEFAULT_PRINTER_LABEL = "System Default"
+
+# How often an open diagnostics window refreshes its stage table
+DIAGNOSTICS_REFRESH_MS = 1000
+
+# Width of the entries and combo boxes in the head properties panel
+PROPERTY_INPUT_WIDTH = 120
+
+# Libraries loaded on first use or by the warm-up thread, not before the window shows
+DEFERRED_MODULES = ("numpy", "qrcode", "barcode", "reportlab", "image_export", "concurrent.futures.process")
+WARM_UP_MODULES = ("qrcode", "barcode", "numpy", "reportlab.pdfbase.pdfmetrics", "reportlab.lib.colors",
+                   "image_export", "concurrent.futures.process")
+
 class NumberingSystemApp:
     def __init__(self):
         self.root = ctk.CTk()
@@ -57,33 +108,59 @@ class NumberingSystemApp:
         self.drag_offset = {"x": 0, "y": 0}
         self.zoom_level = 1.0
         self.background_image = None
+        # Source file of the background, embedded once in PDF output
+        self.background_path = None
+        # Downsampled levels of the background and its resized PhotoImage per canvas size
+        self.background_pyramid = None
+        self.background_photos = OrderedDict()
+        self.background_refine_id = None
         self.paper_rotation = 0
         self.paper_orientation = 'portrait'
-        self.paper_sizes = {
-            'A4': {'width': 210, 'height': 297},
-            'A3': {'width': 297, 'height': 420},
-            'Letter': {'width': 216, 'height': 279},
-            'Legal': {'width': 216, 'height': 356}
-        }
+        self.paper_sizes = PAPER_SIZES
         self.available_fonts = self.load_available_fonts()
         self.paper_px_w = 794  # pixels for A4
         self.paper_px_h = 1123
         self.view_width = 800
         self.view_height = 600
         self.scale = 3.78  # pixels per mm
+        # Rendered ruler strips by (unit, scale, vertical)
+        self.ruler_strips = {}
         self.current_unit = 'mm'
         
         # Store references to images to prevent garbage collection
         self.image_references = {}
+        self.symbol_cache = SymbolCache(SYMBOL_CACHE_BYTES)
+
+        # Retained preview scene: canvas items and photos per head
+        self.preview_scene = {}
+
+        # Background print/export jobs and their progress windows
+        self.progress_windows = {}
+        self.spool_windows = {}
+        self.diagnostics_window = None
+        self.warm_up_thread = None
+        # Modules loaded when the warm-up started, for --startup-time
+        self.modules_before_warm_up = None
+
+        # Pending coalesced preview render
+        self.preview_after_id = None
+        self.preview_generation = 0
 
         # Numbering variables
         self.start_num_var = tk.StringVar(value="1")
         self.step_var = tk.StringVar(value="1")
         self.total_pages_var = tk.StringVar(value="10")
         self.copies_var = tk.StringVar(value="1")
+        self.collate_var = tk.BooleanVar(value=True)
         self.skip_var = tk.StringVar(value="0")
         self.order_var = tk.StringVar(value="Ascending")
 
+        # Printer selection, discovered in the background and remembered between sessions
+        self.preferences = load_preferences()
+        self.printer_registry = PrinterRegistry()
+        self.printer_var = tk.StringVar(value=DEFAULT_PRINTER_LABEL)
+        self.printer_refresh_id = None
+
         # Scrollbar references
         self.h_scroll = None
         self.v_scroll = None
@@ -98,11 +175,27 @@ class NumberingSystemApp:
         # Initial setup
         self.root.after_idle(self.initial_fit)
         self.apply_zoom()
+        self.refresh_printers()
 
     def initial_fit(self):
         self.root.update_idletasks()
         self.view_width = self.horizontal_ruler.winfo_width()
         self.view_height = self.vertical_ruler.winfo_height()
+        # The window is up; load the symbology and PDF libraries before they are first needed
+        self.modules_before_warm_up = set(sys.modules)
+        self.warm_up_thread = threading.Thread(target=self.warm_up_dependencies, daemon=True)
+        self.warm_up_thread.start()
+
+    def warm_up_dependencies(self):
+        """Import the libraries that the preview and exports load on first use"""
+        for name in WARM_UP_MODULES:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                # Optional (numpy) or broken; the feature reports it on use
+                pass
+            except Exception as e:
+                print(f"Warm-up error: {e}")
 
     def validate_numeric_input(self, value):
         """Validate numeric input - allow empty string or numbers"""
@@ -114,54 +207,6 @@ class NumberingSystemApp:
         except ValueError:
             return False
 
-    def get_pdf_font(self, head):
-        font_map = {
-            'Arial': 'Helvetica',
-            'Arial Black': 'Helvetica-Bold',
-            'Arial Narrow': 'Helvetica',
-            'Calibri': 'Helvetica',
-            'Cambria': 'Times-Roman',
-            'Comic Sans MS': 'Helvetica',
-            'Consolas': 'Courier',
-            'Courier New': 'Courier',
-            'Georgia': 'Times-Roman',
-            'Impact': 'Helvetica-Bold',
-            'Times New Roman': 'Times-Roman',
-            'Trebuchet MS': 'Helvetica',
-            'Verdana': 'Helvetica',
-            'Helvetica': 'Helvetica',
-            'Garamond': 'Times-Roman',
-            'Bookman': 'Times-Roman',
-            'Avant Garde': 'Helvetica',
-            'Futura': 'Helvetica',
-            'Optima': 'Helvetica',
-            'Baskerville': 'Times-Roman',
-            'Didot': 'Times-Roman',
-        }
-        base_font = font_map.get(head['font'], 'Helvetica')
-        if head['bold'] and head['italic']:
-            if base_font == 'Helvetica':
-                return 'Helvetica-BoldOblique'
-            elif base_font == 'Times-Roman':
-                return 'Times-BoldItalic'
-            elif base_font == 'Courier':
-                return 'Courier-BoldOblique'
-        elif head['bold']:
-            if base_font == 'Helvetica':
-                return 'Helvetica-Bold'
-            elif base_font == 'Times-Roman':
-                return 'Times-Bold'
-            elif base_font == 'Courier':
-                return 'Courier-Bold'
-        elif head['italic']:
-            if base_font == 'Helvetica':
-                return 'Helvetica-Oblique'
-            elif base_font == 'Times-Roman':
-                return 'Times-Italic'
-            elif base_font == 'Courier':
-                return 'Courier-Oblique'
-        return base_font
-
     def load_available_fonts(self):
         # Common fonts
         common_fonts = [
@@ -197,17 +242,36 @@ class NumberingSystemApp:
         print_btn = ctk.CTkButton(btn_frame, text="Print", command=self.print_preview, fg_color=SUCCESS_COLOR, hover_color="#059669", width=100)
         print_btn.grid(row=0, column=0, padx=5)
 
+        self.spool_var = tk.StringVar(value="Single Job")
+        spool_menu = ctk.CTkOptionMenu(btn_frame, values=list(SPOOL_OPTIONS), variable=self.spool_var, fg_color=SUCCESS_COLOR, button_color="#059669", button_hover_color="#047857", width=130)
+        spool_menu.grid(row=0, column=1, padx=5)
+
         pdf_btn = ctk.CTkButton(btn_frame, text="Export PDF", command=self.export_pdf, fg_color="#8b5cf6", hover_color="#7c3aed", width=100)
-        pdf_btn.grid(row=0, column=1, padx=5)
+        pdf_btn.grid(row=0, column=2, padx=5)
 
         export_images_btn = ctk.CTkButton(btn_frame, text="Export Images", command=self.export_images, fg_color="#f59e0b", hover_color="#d97706", width=100)
-        export_images_btn.grid(row=0, column=2, padx=5)
+        export_images_btn.grid(row=0, column=3, padx=5)
+
+        self.image_output_var = tk.StringVar(value="Folder")
+        image_output_menu = ctk.CTkOptionMenu(btn_frame, values=["Folder", "ZIP", "TAR", "Sheets", "TIFF"], variable=self.image_output_var, fg_color="#f59e0b", button_color="#d97706", button_hover_color="#b45309", width=80)
+        image_output_menu.grid(row=0, column=4, padx=5)
 
         reset_btn = ctk.CTkButton(btn_frame, text="Reset", command=self.reset_all, fg_color=DANGER_COLOR, hover_color="#dc2626", width=100)
-        reset_btn.grid(row=0, column=3, padx=5)
+        reset_btn.grid(row=0, column=5, padx=5)
 
         add_btn = ctk.CTkButton(btn_frame, text="Add Header", command=self.add_numbering_head, fg_color="#6366f1", hover_color="#4f46e5", width=100)
-        add_btn.grid(row=0, column=4, padx=5)
+        add_btn.grid(row=0, column=6, padx=5)
+
+        diagnostics_btn = ctk.CTkButton(btn_frame, text="Diagnostics", command=self.show_diagnostics, fg_color=SECONDARY_COLOR, hover_color="#4b5563", width=100)
+        diagnostics_btn.grid(row=0, column=7, padx=5)
+
+        open_btn = ctk.CTkButton(btn_frame, text="Open", command=self.open_project, fg_color=PRIMARY_COLOR, hover_color=HIGHLIGHT_COLOR, width=70)
+        open_btn.grid(row=0, column=8, padx=5)
+
+        save_btn = ctk.CTkButton(btn_frame, text="Save", command=self.save_project, fg_color=PRIMARY_COLOR, hover_color=HIGHLIGHT_COLOR, width=70)
+        save_btn.grid(row=0, column=9, padx=5)
+        self.root.bind("<Control-o>", lambda e: self.open_project())
+        self.root.bind("<Control-s>", lambda e: self.save_project())
 
         # Paper Controls
         self.create_paper_controls()
@@ -358,6 +422,9 @@ class NumberingSystemApp:
         # Numbering Settings
         self.create_numbering_settings(self.settings_frame)
 
+        # Printer
+        self.create_printer_settings(self.settings_frame)
+
         # Heads list
         self.create_heads_list_panel(self.settings_frame)
 
@@ -377,6 +444,7 @@ class NumberingSystemApp:
         self.props_container = ctk.CTkFrame(self.properties_frame, fg_color="transparent")
         self.props_container.pack(fill="both", expand=True, padx=10, pady=5)
 
+        self.build_properties_panel()
         self.update_properties_panel(None)
 
     def create_numbering_settings(self, parent):
@@ -413,19 +481,83 @@ class NumberingSystemApp:
 
         # Order
         order_frame = ctk.CTkFrame(num_settings_frame, fg_color="transparent")
-        order_frame.pack(padx=5, pady=(2, 10), fill="x")
+        order_frame.pack(padx=5, pady=2, fill="x")
         label = ctk.CTkLabel(order_frame, text="Order", text_color=TEXT_COLOR, width=120, anchor="w")
         label.pack(side="left")
         self.order_var.set("Ascending")
         order_combo = ctk.CTkComboBox(order_frame, values=["Ascending", "Descending"], variable=self.order_var, fg_color=WHITE_COLOR, button_color=PRIMARY_COLOR, button_hover_color=HIGHLIGHT_COLOR, text_color=TEXT_COLOR, width=120)
         order_combo.pack(side="right", padx=5)
-        order_combo.bind("<<ComboboxSelected>>", lambda e: self.update_preview())
+        order_combo.bind("<<ComboboxSelected>>", lambda e: self.schedule_preview(0))
+
+        # Collate copies
+        collate_frame = ctk.CTkFrame(num_settings_frame, fg_color="transparent")
+        collate_frame.pack(padx=5, pady=(2, 10), fill="x")
+        label = ctk.CTkLabel(collate_frame, text="Collate Copies", text_color=TEXT_COLOR, width=120, anchor="w")
+        label.pack(side="left")
+        collate_check = ctk.CTkCheckBox(collate_frame, text="", variable=self.collate_var, fg_color=PRIMARY_COLOR, hover_color=HIGHLIGHT_COLOR, width=20)
+        collate_check.pack(side="right", padx=5)
+
+    def create_printer_settings(self, parent):
+        printer_frame = ctk.CTkFrame(parent, corner_radius=8, fg_color=WHITE_COLOR, border_width=1)
+        printer_frame.pack(fill="x", pady=5)
+
+        printer_label = ctk.CTkLabel(printer_frame, text="Printer", font=ctk.CTkFont(size=16, weight="bold"), text_color=TEXT_COLOR)
+        printer_label.pack(anchor="w", padx=10, pady=(10, 5))
+
+        row_frame = ctk.CTkFrame(printer_frame, fg_color="transparent")
+        row_frame.pack(padx=5, pady=(2, 10), fill="x")
+        self.printer_var.set(self.preferences.get('printer') or DEFAULT_PRINTER_LABEL)
+        self.printer_combo = ctk.CTkComboBox(row_frame, values=[self.printer_var.get()], variable=self.printer_var, fg_color=WHITE_COLOR, button_color=PRIMARY_COLOR, button_hover_color=HIGHLIGHT_COLOR, text_color=TEXT_COLOR, width=220, state="readonly", command=self.on_printer_change)
+        self.printer_combo.pack(side="left", padx=5)
+        refresh_btn = ctk.CTkButton(row_frame, text="Refresh", command=self.refresh_printers, fg_color=PRIMARY_COLOR, hover_color=HIGHLIGHT_COLOR, width=70)
+        refresh_btn.pack(side="right", padx=5)
+
+    def on_printer_change(self, value):
+        """Remember the chosen printer as the default for the next session"""
+        # The default entry reads "System Default (<queue>)" once printers are discovered
+        self.preferences['printer'] = None if value.startswith(DEFAULT_PRINTER_LABEL) else value
+        save_preferences(self.preferences)
+
+    def refresh_printers(self):
+        """Rediscover printers in the background; also runs on a timer"""
+        if self.printer_refresh_id is not None:
+            self.root.after_cancel(self.printer_refresh_id)
+        self.printer_registry.refresh()
+        self.root.after(PROGRESS_POLL_MS, self.poll_printer_registry)
+        self.printer_refresh_id = self.root.after(PRINTER_REFRESH_MS, self.refresh_printers)
+
+    def poll_printer_registry(self):
+        while True:
+            try:
+                _, printers, default = self.printer_registry.messages.get_nowait()
+            except queue.Empty:
+                break
+            self.update_printer_list(printers, default)
+        if self.printer_registry.thread.is_alive():
+            self.root.after(PROGRESS_POLL_MS, self.poll_printer_registry)
+
+    def update_printer_list(self, printers, default):
+        values = [DEFAULT_PRINTER_LABEL + (f" ({default})" if default else "")] + printers
+        selected = self.printer_var.get()
+        if selected.startswith(DEFAULT_PRINTER_LABEL):
+            self.printer_var.set(values[0])
+        elif selected not in values:
+            # A saved printer that is not installed right now stays selectable
+            values.append(selected)
+        self.printer_combo.configure(values=values)
+
+    def selected_printer(self):
+        """Print queue for the next job, or None to let the print fallbacks decide"""
+        value = self.printer_var.get()
+        if value.startswith(DEFAULT_PRINTER_LABEL):
+            return self.printer_registry.system_default
+        return value
 
     def safe_update_preview(self, var):
         """Safely update preview only if input is valid"""
         try:
             if var.get() == "" or self.validate_numeric_input(var.get()):
-                self.update_preview()
+                self.schedule_preview()
         except:
             pass
 
@@ -567,11 +699,11 @@ class NumberingSystemApp:
         corner_frame.grid_propagate(False)
 
         # Horizontal Ruler
-        self.horizontal_ruler = tk.Canvas(self.preview_scroll_frame, height=30, bg=RULER_COLOR, highlightthickness=0, bd=1, relief="solid", highlightbackground=RULER_BORDER_COLOR)
+        self.horizontal_ruler = tk.Canvas(self.preview_scroll_frame, height=RULER_SIZE, bg=RULER_COLOR, highlightthickness=0, bd=1, relief="solid", highlightbackground=RULER_BORDER_COLOR)
         self.horizontal_ruler.grid(row=0, column=1, sticky="ew")
 
         # Vertical Ruler
-        self.vertical_ruler = tk.Canvas(self.preview_scroll_frame, width=30, bg=RULER_COLOR, highlightthickness=0, bd=1, relief="solid", highlightbackground=RULER_BORDER_COLOR)
+        self.vertical_ruler = tk.Canvas(self.preview_scroll_frame, width=RULER_SIZE, bg=RULER_COLOR, highlightthickness=0, bd=1, relief="solid", highlightbackground=RULER_BORDER_COLOR)
         self.vertical_ruler.grid(row=1, column=0, sticky="ns")
 
         # Create container for canvas
@@ -637,7 +769,7 @@ class NumberingSystemApp:
         self.preview_canvas.bind("<ButtonRelease-1>", self.stop_drag)
 
     def update_background(self, event=None):
-        if not self.background_image:
+        if not self.background_pyramid:
             return
         canvas = self.preview_canvas
         w = canvas.winfo_width()
@@ -646,12 +778,45 @@ class NumberingSystemApp:
             self.root.after(100, self.update_background)
             return
         try:
-            bg_resized = self.background_image.resize((w, h), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(bg_resized)
-            self.image_references['bg_fixed'] = photo
-            canvas.delete("bg_fixed")
+            size = (w, h)
+            photo = self.background_photos.get(size)
+            if photo is not None:
+                self.background_photos.move_to_end(size)
+            else:
+                # Show a quick approximation now and refine it once resizing settles
+                photo = ImageTk.PhotoImage(self.background_pyramid.fast(size))
+                self.schedule_background_refine(size)
+            self.show_background(photo)
+        except Exception as e:
+            print(f"Background update error: {e}")
+
+    def show_background(self, photo):
+        canvas = self.preview_canvas
+        self.image_references['bg_fixed'] = photo
+        if canvas.find_withtag("bg_fixed"):
+            canvas.itemconfigure("bg_fixed", image=photo)
+        else:
             canvas.create_image(0, 0, image=photo, anchor="nw", tags="bg_fixed")
             canvas.tag_lower("bg_fixed")
+
+    def schedule_background_refine(self, size):
+        if self.background_refine_id is not None:
+            self.root.after_cancel(self.background_refine_id)
+        pyramid = self.background_pyramid
+        self.background_refine_id = self.root.after(BACKGROUND_REFINE_MS, lambda: self.refine_background(pyramid, size))
+
+    def refine_background(self, pyramid, size):
+        """Swap the approximate background for a LANCZOS resize and memoize it"""
+        self.background_refine_id = None
+        canvas = self.preview_canvas
+        if pyramid is not self.background_pyramid or size != (canvas.winfo_width(), canvas.winfo_height()):
+            return
+        try:
+            photo = ImageTk.PhotoImage(pyramid.high_quality(size))
+            self.background_photos[size] = photo
+            while len(self.background_photos) > BACKGROUND_PHOTO_CACHE:
+                self.background_photos.popitem(last=False)
+            self.show_background(photo)
         except Exception as e:
             print(f"Background update error: {e}")
 
@@ -741,40 +906,48 @@ class NumberingSystemApp:
             self.br_corner.grid_remove()
 
     def update_ruler_ticks(self, width, height):
-        """Creates ticks and labels for rulers using Canvas for better appearance."""
-        # Clear existing ticks
-        self.horizontal_ruler.delete("all")
-        self.vertical_ruler.delete("all")
-
+        """Shows the cached ruler strips for the current unit and scale; the rulers crop them."""
         unit = self.ruler_unit_var.get()
-        if unit == 'mm':
-            unit_to_mm = 1
-            minor_step_unit = 1
-            major_interval_unit = 5
-            label_interval_unit = 10
-            div_suffix = 'mm'
-        elif unit == 'cm':
-            unit_to_mm = 10
-            minor_step_unit = 1
-            major_interval_unit = 5
-            label_interval_unit = 10
-            div_suffix = 'cm'
-        elif unit == 'inch':
-            unit_to_mm = 25.4
-            minor_step_unit = 0.25
-            major_interval_unit = 1
-            label_interval_unit = 2
-            div_suffix = '"'
+        for ruler, length, vertical in ((self.horizontal_ruler, width, False), (self.vertical_ruler, height, True)):
+            photo = self.get_ruler_strip(unit, vertical, length)
+            if ruler.find_withtag("strip"):
+                ruler.itemconfigure("strip", image=photo)
+            else:
+                ruler.delete("all")
+                ruler.create_image(0, 0, image=photo, anchor="nw", tags="strip")
+
+    def get_ruler_strip(self, unit, vertical, length):
+        """Pre-rendered ruler image per (unit, scale), at least as long as the screen"""
+        key = (unit, self.scale, vertical)
+        photo = self.ruler_strips.get(key)
+        if photo is None or (photo.height() if vertical else photo.width()) < length:
+            screen = self.root.winfo_screenheight() if vertical else self.root.winfo_screenwidth()
+            photo = ImageTk.PhotoImage(self.render_ruler_strip(unit, vertical, max(length, screen)))
+            self.ruler_strips[key] = photo
+        return photo
+
+    def render_ruler_strip(self, unit, vertical, length):
+        """Draws ticks and labels of one ruler into an image."""
+        unit_to_mm, minor_step_unit, major_interval_unit, label_interval_unit, div_suffix = RULER_UNITS.get(unit, RULER_UNITS['mm'])
+        size = (RULER_SIZE, length) if vertical else (length, RULER_SIZE)
+        image = Image.new("RGB", size, RULER_COLOR)
+        draw = ImageDraw.Draw(image)
+        try:
+            font = ImageFont.truetype("arial.ttf", RULER_FONT_PX)
+        except OSError:
+            try:
+                font = ImageFont.load_default(RULER_FONT_PX)
+            except TypeError:
+                # Pillow before 10.1 has only the fixed-size bitmap font
+                font = ImageFont.load_default()
 
         px_per_unit = self.scale * unit_to_mm
         epsilon = 1e-6
-
-        # Horizontal ruler
-        num_steps = int(width / (minor_step_unit * px_per_unit)) + 2
+        num_steps = int(length / (minor_step_unit * px_per_unit)) + 2
         for k in range(num_steps + 1):
             div = k * minor_step_unit
-            pos_px = round(div * px_per_unit)
-            if pos_px > width:
+            pos = round(div * px_per_unit)
+            if pos > length:
                 break
             is_major = abs(math.fmod(div, major_interval_unit)) < epsilon
             is_label = abs(math.fmod(div, label_interval_unit)) < epsilon
@@ -783,35 +956,20 @@ class NumberingSystemApp:
                 tick_len = 10
             if is_label:
                 tick_len = 15
-            self.horizontal_ruler.create_line(pos_px, 0, pos_px, tick_len, fill=RULER_TICK_COLOR, width=1)
+            if vertical:
+                draw.line((0, pos, tick_len - 1, pos), fill=RULER_TICK_COLOR)
+            else:
+                draw.line((pos, 0, pos, tick_len - 1), fill=RULER_TICK_COLOR)
             if is_label:
                 if unit == 'inch':
                     label_text = f"{div:g}{div_suffix}"
                 else:
                     label_text = f"{int(div)}{div_suffix}"
-                self.horizontal_ruler.create_text(pos_px, tick_len + 6, text=label_text, anchor="n", fill=TEXT_COLOR, font=("Arial", 8))
-
-        # Vertical ruler
-        num_steps = int(height / (minor_step_unit * px_per_unit)) + 2
-        for k in range(num_steps + 1):
-            div = k * minor_step_unit
-            pos_py = round(div * px_per_unit)
-            if pos_py > height:
-                break
-            is_major = abs(math.fmod(div, major_interval_unit)) < epsilon
-            is_label = abs(math.fmod(div, label_interval_unit)) < epsilon
-            tick_len = 5
-            if is_major:
-                tick_len = 10
-            if is_label:
-                tick_len = 15
-            self.vertical_ruler.create_line(0, pos_py, tick_len, pos_py, fill=RULER_TICK_COLOR, width=1)
-            if is_label:
-                if unit == 'inch':
-                    label_text = f"{div:g}{div_suffix}"
+                if vertical:
+                    draw.text((tick_len + 6, pos), label_text, fill=TEXT_COLOR, font=font, anchor="lm")
                 else:
-                    label_text = f"{int(div)}{div_suffix}"
-                self.vertical_ruler.create_text(tick_len + 6, pos_py, text=label_text, anchor="w", fill=TEXT_COLOR, font=("Arial", 8))
+                    draw.text((pos, tick_len + 6), label_text, fill=TEXT_COLOR, font=font, anchor="mt")
+        return image
 
     def on_custom_size_change(self, event=None):
         try:
@@ -829,14 +987,24 @@ class NumberingSystemApp:
 
     def set_orientation(self, orient):
         self.paper_orientation = orient
+        self.highlight_paper_buttons()
+        self.update_paper_size()
+
+    def highlight_paper_buttons(self):
+        """Mark the current orientation and rotation buttons"""
         default_color = WHITE_COLOR
-        if orient == 'portrait':
+        if self.paper_orientation == 'portrait':
             self.portrait_btn.configure(fg_color=PRIMARY_COLOR, text_color=WHITE_COLOR)
             self.landscape_btn.configure(fg_color=default_color, text_color=TEXT_COLOR)
         else:
             self.landscape_btn.configure(fg_color=PRIMARY_COLOR, text_color=WHITE_COLOR)
             self.portrait_btn.configure(fg_color=default_color, text_color=TEXT_COLOR)
-        self.update_paper_size()
+        for btn in self.rot_btns:
+            deg_text = int(btn.cget("text")[:-1])
+            if deg_text == self.paper_rotation:
+                btn.configure(fg_color=PRIMARY_COLOR, text_color=WHITE_COLOR)
+            else:
+                btn.configure(fg_color=default_color, text_color=TEXT_COLOR)
 
     def update_paper_size(self, value=None):
         size = self.paper_var.get()
@@ -867,13 +1035,7 @@ class NumberingSystemApp:
 
     def rotate_paper(self, degrees):
         self.paper_rotation = degrees
-        default_color = WHITE_COLOR
-        for btn in self.rot_btns:
-            deg_text = int(btn.cget("text")[:-1])
-            if deg_text == degrees:
-                btn.configure(fg_color=PRIMARY_COLOR, text_color=WHITE_COLOR)
-            else:
-                btn.configure(fg_color=default_color, text_color=TEXT_COLOR)
+        self.highlight_paper_buttons()
         self.update_paper_size()
 
     def update_bg_color(self, event=None):
@@ -883,7 +1045,7 @@ class NumberingSystemApp:
                 self.color_preview.configure(fg_color=color)
                 self.preview_canvas.configure(bg=color)
                 self.preview_container.configure(bg=color)
-                self.update_preview()
+                self.schedule_preview()
         except (ValueError, tk.TclError):
             pass
 
@@ -897,314 +1059,186 @@ class NumberingSystemApp:
         file = filedialog.askopenfilename(filetypes=[("Image files", "*.png *.jpg *.jpeg")])
         if file:
             try:
-                self.background_image = Image.open(file)
-                self.root.after(100, self.update_background)
+                self.load_background(file)
             except Exception as e:
                 messagebox.showerror("Error", f"Could not load image: {e}")
 
+    def load_background(self, file):
+        self.background_image = Image.open(file)
+        self.background_path = file
+        self.background_pyramid = BackgroundPyramid(self.background_image)
+        self.background_photos.clear()
+        self.root.after(100, self.update_background)
+
     def remove_background(self):
         self.background_image = None
+        self.background_path = None
+        self.background_pyramid = None
+        self.background_photos.clear()
         self.preview_canvas.delete("bg_fixed")
         self.image_references.pop('bg_fixed', None)
 
     def add_numbering_head(self):
         head_id = len(self.numbering_heads)
-        head = {
-            'id': head_id,
-            'name': f'Head {head_id + 1}',
-            'font': 'Arial',
-            'size': 16,
-            'rotation': 0,
-            'x': 100,
-            'y': 100,
-            'prefix': '',
-            'seed': '',
-            'add_space_after_prefix': False,
-            'zero_pad': 0,
-            'suffix': '',
-            'show_qr': False,
-            'qr_size': 50,
-            'qr_space': 10,
-            'show_barcode': False,
-            'barcode_type': 'CODE128',
-            'barcode_height': 50,
-            'barcode_width': 2,
-            'barcode_display_value': True,
-            'barcode_text_space': 5,  # FIXED: Space between barcode and text
-            'barcode_space': 10,
-            'bold': False,
-            'italic': False,
-            'underline': False,
-            'selected': True
-        }
+        head = new_head(head_id)
         self.numbering_heads.append(head)
         self.update_heads_list()
         self.select_head(head_id)
 
-    def update_properties_panel(self, head):
-        for widget in self.props_container.winfo_children():
-            widget.destroy()
-
-        if not head:
-            label = ctk.CTkLabel(self.props_container, text="Select a head to edit properties", text_color=SECONDARY_COLOR)
-            label.pack(expand=True)
-            return
+    def build_properties_panel(self):
+        """Create the head property widgets once; update_properties_panel re-binds them"""
+        self.prop_vars = {}
+        self.format_buttons = {}
+        self.format_states = {}
 
-        INPUT_WIDTH = 120
+        self.props_empty_label = ctk.CTkLabel(self.props_container, text="Select a head to edit properties", text_color=SECONDARY_COLOR)
+        self.props_fields = ctk.CTkFrame(self.props_container, fg_color="transparent")
+        parent = self.props_fields
 
         # Font
-        font_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
+        font_row = ctk.CTkFrame(parent, fg_color="transparent")
         font_row.pack(fill="x", padx=10, pady=2)
         font_row.grid_columnconfigure(1, weight=1)
         font_label = ctk.CTkLabel(font_row, text="Font", text_color=TEXT_COLOR, anchor="w")
         font_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-        font_var = tk.StringVar(value=head['font'])
-        font_combo = ctk.CTkComboBox(font_row, values=self.available_fonts, variable=font_var, fg_color=WHITE_COLOR, button_color=PRIMARY_COLOR, button_hover_color=HIGHLIGHT_COLOR, text_color=TEXT_COLOR, width=INPUT_WIDTH, command=lambda v: self.update_head_property('font', v))
+        font_var = self.prop_vars['font'] = tk.StringVar()
+        font_combo = ctk.CTkComboBox(font_row, values=self.available_fonts, variable=font_var, fg_color=WHITE_COLOR, button_color=PRIMARY_COLOR, button_hover_color=HIGHLIGHT_COLOR, text_color=TEXT_COLOR, width=PROPERTY_INPUT_WIDTH, command=lambda v: self.update_head_property('font', v))
         font_combo.grid(row=0, column=1, sticky="e")
 
         # Text Formatting
-        fmt_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
+        fmt_row = ctk.CTkFrame(parent, fg_color="transparent")
         fmt_row.pack(fill="x", padx=10, pady=2)
         fmt_label = ctk.CTkLabel(fmt_row, text="Text Formatting", text_color=TEXT_COLOR, anchor="w")
         fmt_label.pack(side="left", padx=(0, 5))
         fmt_frame = ctk.CTkFrame(fmt_row, fg_color="transparent")
         fmt_frame.pack(side="right", fill="x", expand=True)
-        bold_btn = ctk.CTkButton(fmt_frame, text="B", width=30, command=lambda: self.toggle_format('bold'), fg_color=PRIMARY_COLOR if head['bold'] else WHITE_COLOR, hover_color=HIGHLIGHT_COLOR, text_color=WHITE_COLOR if head['bold'] else TEXT_COLOR, border_width=1, border_color="#d1d5db")
-        bold_btn.pack(side="right", padx=2)
-        italic_btn = ctk.CTkButton(fmt_frame, text="I", width=30, command=lambda: self.toggle_format('italic'), fg_color=PRIMARY_COLOR if head['italic'] else WHITE_COLOR, hover_color=HIGHLIGHT_COLOR, text_color=WHITE_COLOR if head['italic'] else TEXT_COLOR, border_width=1, border_color="#d1d5db")
-        italic_btn.pack(side="right", padx=2)
-        underline_btn = ctk.CTkButton(fmt_frame, text="U", width=30, command=lambda: self.toggle_format('underline'), fg_color=PRIMARY_COLOR if head['underline'] else WHITE_COLOR, hover_color=HIGHLIGHT_COLOR, text_color=WHITE_COLOR if head['underline'] else TEXT_COLOR, border_width=1, border_color="#d1d5db")
-        underline_btn.pack(side="right", padx=2)
-
-        # Size
-        size_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-        size_row.pack(fill="x", padx=10, pady=2)
-        size_row.grid_columnconfigure(1, weight=1)
-        size_label = ctk.CTkLabel(size_row, text="Size", text_color=TEXT_COLOR, anchor="w")
-        size_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-        size_var = tk.StringVar(value=str(head['size']))
-        size_entry = ctk.CTkEntry(size_row, textvariable=size_var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=INPUT_WIDTH)
-        size_entry.grid(row=0, column=1, sticky="e")
-        size_entry.configure(validate="key", validatecommand=(self.root.register(self.validate_numeric_input), '%P'))
-        size_entry.bind('<KeyRelease>', lambda e: self.update_head_property('size', size_var.get()))
+        for fmt, text in (('bold', "B"), ('italic', "I"), ('underline', "U")):
+            btn = ctk.CTkButton(fmt_frame, text=text, width=30, command=lambda f=fmt: self.toggle_format(f), fg_color=WHITE_COLOR, hover_color=HIGHLIGHT_COLOR, text_color=TEXT_COLOR, border_width=1, border_color="#d1d5db")
+            btn.pack(side="right", padx=2)
+            self.format_buttons[fmt] = btn
+            self.format_states[fmt] = False
+
+        self.property_entry(parent, "Size", 'size')
 
         # Rotation
-        rot_label = ctk.CTkLabel(self.props_container, text="Rotation (degrees)", text_color=TEXT_COLOR)
+        rot_label = ctk.CTkLabel(parent, text="Rotation (degrees)", text_color=TEXT_COLOR)
         rot_label.pack(anchor="w", padx=10, pady=(5, 2))
-        rot_var = tk.StringVar(value=str(head['rotation']))
         def rot_cmd(v):
             try:
                 val = int(float(v))
                 self.update_head_property('rotation', val)
-                rot_value_label.configure(text=f"{val}°")
+                self.rot_value_label.configure(text=f"{val}°")
             except (ValueError, tk.TclError):
                 pass
-        rot_slider = ctk.CTkSlider(self.props_container, from_=-180, to=180, command=rot_cmd, progress_color=PRIMARY_COLOR, button_color=PRIMARY_COLOR, button_hover_color=HIGHLIGHT_COLOR)
-        rot_slider.set(head['rotation'])
-        rot_slider.pack(fill="x", padx=10, pady=2)
-        rot_value_label = ctk.CTkLabel(self.props_container, text=f"{head['rotation']}°", text_color=TEXT_COLOR)
-        rot_value_label.pack(padx=10, pady=(0, 5))
-
-        # X Position
-        x_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-        x_row.pack(fill="x", padx=10, pady=2)
-        x_row.grid_columnconfigure(1, weight=1)
-        x_label = ctk.CTkLabel(x_row, text="X Position", text_color=TEXT_COLOR, anchor="w")
-        x_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-        x_var = tk.StringVar(value=str(head['x']))
-        x_entry = ctk.CTkEntry(x_row, textvariable=x_var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=INPUT_WIDTH)
-        x_entry.grid(row=0, column=1, sticky="e")
-        x_entry.configure(validate="key", validatecommand=(self.root.register(self.validate_numeric_input), '%P'))
-        x_entry.bind('<KeyRelease>', lambda e: self.update_head_property('x', x_var.get()))
-
-        # Y Position
-        y_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-        y_row.pack(fill="x", padx=10, pady=2)
-        y_row.grid_columnconfigure(1, weight=1)
-        y_label = ctk.CTkLabel(y_row, text="Y Position", text_color=TEXT_COLOR, anchor="w")
-        y_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-        y_var = tk.StringVar(value=str(head['y']))
-        y_entry = ctk.CTkEntry(y_row, textvariable=y_var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=INPUT_WIDTH)
-        y_entry.grid(row=0, column=1, sticky="e")
-        y_entry.configure(validate="key", validatecommand=(self.root.register(self.validate_numeric_input), '%P'))
-        y_entry.bind('<KeyRelease>', lambda e: self.update_head_property('y', y_var.get()))
-
-        # Prefix
-        prefix_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-        prefix_row.pack(fill="x", padx=10, pady=2)
-        prefix_row.grid_columnconfigure(1, weight=1)
-        prefix_label = ctk.CTkLabel(prefix_row, text="Prefix", text_color=TEXT_COLOR, anchor="w")
-        prefix_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-        prefix_var = tk.StringVar(value=head['prefix'])
-        prefix_entry = ctk.CTkEntry(prefix_row, textvariable=prefix_var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=INPUT_WIDTH)
-        prefix_entry.grid(row=0, column=1, sticky="e")
-        prefix_entry.bind('<KeyRelease>', lambda e: self.update_head_property('prefix', prefix_var.get()))
-
-        # Seed
-        seed_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-        seed_row.pack(fill="x", padx=10, pady=2)
-        seed_row.grid_columnconfigure(1, weight=1)
-        seed_label = ctk.CTkLabel(seed_row, text="Seed", text_color=TEXT_COLOR, anchor="w")
-        seed_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-        seed_var = tk.StringVar(value=head['seed'])
-        seed_entry = ctk.CTkEntry(seed_row, textvariable=seed_var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=INPUT_WIDTH)
-        seed_entry.grid(row=0, column=1, sticky="e")
-        seed_entry.configure(validate="key", validatecommand=(self.root.register(self.validate_numeric_input), '%P'))
-        seed_entry.bind('<KeyRelease>', lambda e: self.update_head_property('seed', seed_var.get()))
-
-        # Add space after prefix
-        space_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-        space_row.pack(fill="x", padx=10, pady=2)
-        space_row.grid_columnconfigure(1, weight=1)
-        space_var = tk.BooleanVar(value=head['add_space_after_prefix'])
-        space_check = ctk.CTkCheckBox(space_row, text="", variable=space_var, fg_color=PRIMARY_COLOR, hover_color=HIGHLIGHT_COLOR, command=lambda: self.update_head_property('add_space_after_prefix', space_var.get()))
-        space_check.grid(row=0, column=0, sticky="w", padx=(0, 5))
-        space_label = ctk.CTkLabel(space_row, text="Add space after prefix", text_color=TEXT_COLOR, anchor="w")
-        space_label.grid(row=0, column=1, sticky="w")
-
-        # Suffix
-        suffix_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-        suffix_row.pack(fill="x", padx=10, pady=2)
-        suffix_row.grid_columnconfigure(1, weight=1)
-        suffix_label = ctk.CTkLabel(suffix_row, text="Suffix", text_color=TEXT_COLOR, anchor="w")
-        suffix_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-        suffix_var = tk.StringVar(value=head['suffix'])
-        suffix_entry = ctk.CTkEntry(suffix_row, textvariable=suffix_var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=INPUT_WIDTH)
-        suffix_entry.grid(row=0, column=1, sticky="e")
-        suffix_entry.bind('<KeyRelease>', lambda e: self.update_head_property('suffix', suffix_var.get()))
+        self.rot_slider = ctk.CTkSlider(parent, from_=-180, to=180, command=rot_cmd, progress_color=PRIMARY_COLOR, button_color=PRIMARY_COLOR, button_hover_color=HIGHLIGHT_COLOR)
+        self.rot_slider.pack(fill="x", padx=10, pady=2)
+        self.rot_value_label = ctk.CTkLabel(parent, text="0°", text_color=TEXT_COLOR)
+        self.rot_value_label.pack(padx=10, pady=(0, 5))
+
+        self.property_entry(parent, "X Position", 'x')
+        self.property_entry(parent, "Y Position", 'y')
+        self.property_entry(parent, "Prefix", 'prefix', numeric=False)
+        self.property_entry(parent, "Seed", 'seed')
+        self.property_check(parent, "Add space after prefix", 'add_space_after_prefix')
+        self.property_entry(parent, "Suffix", 'suffix', numeric=False)
 
         # Zero pad
-        zero_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-        zero_row.pack(fill="x", padx=10, pady=2)
-        zero_row.grid_columnconfigure(1, weight=1)
-        zero_label = ctk.CTkLabel(zero_row, text="Zero pad number for a total of", text_color=TEXT_COLOR, anchor="w")
-        zero_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-        zero_var = tk.StringVar(value=str(head['zero_pad']))
-        zero_entry = ctk.CTkEntry(zero_row, textvariable=zero_var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=INPUT_WIDTH)
-        zero_entry.grid(row=0, column=1, sticky="w")
-        zero_entry.configure(validate="key", validatecommand=(self.root.register(self.validate_numeric_input), '%P'))
-        zero_entry.bind('<KeyRelease>', lambda e: self.update_head_property('zero_pad', zero_var.get()))
+        zero_row = self.property_entry(parent, "Zero pad number for a total of", 'zero_pad', sticky="w")
         zero_digits_label = ctk.CTkLabel(zero_row, text="digits", text_color=TEXT_COLOR, anchor="w")
         zero_digits_label.grid(row=0, column=2, sticky="w", padx=(5, 0))
 
-        # Show QR
-        qr_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-        qr_row.pack(fill="x", padx=10, pady=2)
-        qr_row.grid_columnconfigure(1, weight=1)
-        qr_var = tk.BooleanVar(value=head['show_qr'])
-        qr_check = ctk.CTkCheckBox(qr_row, text="", variable=qr_var, fg_color=PRIMARY_COLOR, hover_color=HIGHLIGHT_COLOR, command=lambda: self.update_head_property('show_qr', qr_var.get()))
-        qr_check.grid(row=0, column=0, sticky="w", padx=(0, 5))
-        qr_label = ctk.CTkLabel(qr_row, text="Show QR Code", text_color=TEXT_COLOR, anchor="w")
-        qr_label.grid(row=0, column=1, sticky="w")
-
-        if head['show_qr']:
-            qr_size_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-            qr_size_row.pack(fill="x", padx=10, pady=2)
-            qr_size_row.grid_columnconfigure(1, weight=1)
-            qr_size_label = ctk.CTkLabel(qr_size_row, text="QR Code Size", text_color=TEXT_COLOR, anchor="w")
-            qr_size_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-            qr_size_var = tk.StringVar(value=str(head['qr_size']))
-            qr_size_entry = ctk.CTkEntry(qr_size_row, textvariable=qr_size_var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=INPUT_WIDTH)
-            qr_size_entry.grid(row=0, column=1, sticky="ew")
-            qr_size_entry.configure(validate="key", validatecommand=(self.root.register(self.validate_numeric_input), '%P'))
-            qr_size_entry.bind('<KeyRelease>', lambda e: self.update_head_property('qr_size', qr_size_var.get()))
-
-            # QR Space
-            qr_space_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-            qr_space_row.pack(fill="x", padx=10, pady=2)
-            qr_space_row.grid_columnconfigure(1, weight=1)
-            qr_space_label = ctk.CTkLabel(qr_space_row, text="QR Space (px)", text_color=TEXT_COLOR, anchor="w")
-            qr_space_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-            qr_space_var = tk.StringVar(value=str(head['qr_space']))
-            qr_space_entry = ctk.CTkEntry(qr_space_row, textvariable=qr_space_var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=INPUT_WIDTH)
-            qr_space_entry.grid(row=0, column=1, sticky="ew")
-            qr_space_entry.configure(validate="key", validatecommand=(self.root.register(self.validate_numeric_input), '%P'))
-            qr_space_entry.bind('<KeyRelease>', lambda e: self.update_head_property('qr_space', qr_space_var.get()))
-
-        # Show Barcode
-        bc_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-        bc_row.pack(fill="x", padx=10, pady=2)
-        bc_row.grid_columnconfigure(1, weight=1)
-        bc_var = tk.BooleanVar(value=head['show_barcode'])
-        bc_check = ctk.CTkCheckBox(bc_row, text="", variable=bc_var, fg_color=PRIMARY_COLOR, hover_color=HIGHLIGHT_COLOR, command=lambda: self.update_head_property('show_barcode', bc_var.get()))
-        bc_check.grid(row=0, column=0, sticky="w", padx=(0, 5))
-        bc_label = ctk.CTkLabel(bc_row, text="Show Barcode", text_color=TEXT_COLOR, anchor="w")
-        bc_label.grid(row=0, column=1, sticky="w")
-
-        if head['show_barcode']:
-            # Barcode Type
-            bc_type_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-            bc_type_row.pack(fill="x", padx=10, pady=2)
-            bc_type_row.grid_columnconfigure(1, weight=1)
-            bc_type_label = ctk.CTkLabel(bc_type_row, text="Barcode Type", text_color=TEXT_COLOR, anchor="w")
-            bc_type_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-            bc_type_var = tk.StringVar(value=head['barcode_type'])
-            bc_type_combo = ctk.CTkComboBox(bc_type_row, values=['CODE128', 'CODE39', 'EAN13', 'EAN8', 'UPCA'], variable=bc_type_var, fg_color=WHITE_COLOR, button_color=PRIMARY_COLOR, button_hover_color=HIGHLIGHT_COLOR, text_color=TEXT_COLOR, width=INPUT_WIDTH, command=lambda v: self.update_head_property('barcode_type', v))
-            bc_type_combo.grid(row=0, column=1, sticky="ew")
-
-            # Barcode Space
-            bc_space_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-            bc_space_row.pack(fill="x", padx=10, pady=2)
-            bc_space_row.grid_columnconfigure(1, weight=1)
-            bc_space_label = ctk.CTkLabel(bc_space_row, text="Barcode Space (px)", text_color=TEXT_COLOR, anchor="w")
-            bc_space_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-            bc_space_var = tk.StringVar(value=str(head['barcode_space']))
-            bc_space_entry = ctk.CTkEntry(bc_space_row, textvariable=bc_space_var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=INPUT_WIDTH)
-            bc_space_entry.grid(row=0, column=1, sticky="ew")
-            bc_space_entry.configure(validate="key", validatecommand=(self.root.register(self.validate_numeric_input), '%P'))
-            bc_space_entry.bind('<KeyRelease>', lambda e: self.update_head_property('barcode_space', bc_space_var.get()))
-
-            # Barcode Height
-            bc_height_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-            bc_height_row.pack(fill="x", padx=10, pady=2)
-            bc_height_row.grid_columnconfigure(1, weight=1)
-            bc_height_label = ctk.CTkLabel(bc_height_row, text="Barcode Height", text_color=TEXT_COLOR, anchor="w")
-            bc_height_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-            bc_height_var = tk.StringVar(value=str(head['barcode_height']))
-            bc_height_entry = ctk.CTkEntry(bc_height_row, textvariable=bc_height_var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=INPUT_WIDTH)
-            bc_height_entry.grid(row=0, column=1, sticky="ew")
-            bc_height_entry.configure(validate="key", validatecommand=(self.root.register(self.validate_numeric_input), '%P'))
-            bc_height_entry.bind('<KeyRelease>', lambda e: self.update_head_property('barcode_height', bc_height_var.get()))
-
-            # Barcode Width
-            bc_width_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-            bc_width_row.pack(fill="x", padx=10, pady=2)
-            bc_width_row.grid_columnconfigure(1, weight=1)
-            bc_width_label = ctk.CTkLabel(bc_width_row, text="Barcode Width", text_color=TEXT_COLOR, anchor="w")
-            bc_width_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-            bc_width_var = tk.StringVar(value=str(head['barcode_width']))
-            bc_width_entry = ctk.CTkEntry(bc_width_row, textvariable=bc_width_var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=INPUT_WIDTH)
-            bc_width_entry.grid(row=0, column=1, sticky="ew")
-            bc_width_entry.configure(validate="key", validatecommand=(self.root.register(self.validate_numeric_input), '%P'))
-            bc_width_entry.bind('<KeyRelease>', lambda e: self.update_head_property('barcode_width', bc_width_var.get()))
-
-            # Display Value
-            bc_disp_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-            bc_disp_row.pack(fill="x", padx=10, pady=2)
-            bc_disp_row.grid_columnconfigure(1, weight=1)
-            bc_disp_var = tk.BooleanVar(value=head['barcode_display_value'])
-            bc_disp_check = ctk.CTkCheckBox(bc_disp_row, text="", variable=bc_disp_var, fg_color=PRIMARY_COLOR, hover_color=HIGHLIGHT_COLOR, command=lambda: self.update_head_property('barcode_display_value', bc_disp_var.get()))
-            bc_disp_check.grid(row=0, column=0, sticky="w", padx=(0, 5))
-            bc_disp_label = ctk.CTkLabel(bc_disp_row, text="Display Value", text_color=TEXT_COLOR, anchor="w")
-            bc_disp_label.grid(row=0, column=1, sticky="w")
-
-            # Barcode Text Space (NEW)
-            bc_text_space_row = ctk.CTkFrame(self.props_container, fg_color="transparent")
-            bc_text_space_row.pack(fill="x", padx=10, pady=2)
-            bc_text_space_row.grid_columnconfigure(1, weight=1)
-            bc_text_space_label = ctk.CTkLabel(bc_text_space_row, text="Barcode Text Space (px)", text_color=TEXT_COLOR, anchor="w")
-            bc_text_space_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
-            bc_text_space_var = tk.StringVar(value=str(head['barcode_text_space']))
-            bc_text_space_entry = ctk.CTkEntry(bc_text_space_row, textvariable=bc_text_space_var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=INPUT_WIDTH)
-            bc_text_space_entry.grid(row=0, column=1, sticky="ew")
-            bc_text_space_entry.configure(validate="key", validatecommand=(self.root.register(self.validate_numeric_input), '%P'))
-            bc_text_space_entry.bind('<KeyRelease>', lambda e: self.update_head_property('barcode_text_space', bc_text_space_var.get()))
+        # QR code section, shown while the head has a QR code
+        self.qr_row = self.property_check(parent, "Show QR Code", 'show_qr')
+        self.qr_section = ctk.CTkFrame(parent, fg_color="transparent")
+        self.property_entry(self.qr_section, "QR Code Size", 'qr_size', sticky="ew")
+        self.property_entry(self.qr_section, "QR Space (px)", 'qr_space', sticky="ew")
+
+        # Barcode section, shown while the head has a barcode
+        self.bc_row = self.property_check(parent, "Show Barcode", 'show_barcode')
+        self.bc_section = ctk.CTkFrame(parent, fg_color="transparent")
+        bc_type_row = ctk.CTkFrame(self.bc_section, fg_color="transparent")
+        bc_type_row.pack(fill="x", padx=10, pady=2)
+        bc_type_row.grid_columnconfigure(1, weight=1)
+        bc_type_label = ctk.CTkLabel(bc_type_row, text="Barcode Type", text_color=TEXT_COLOR, anchor="w")
+        bc_type_label.grid(row=0, column=0, sticky="w", padx=(0, 5))
+        bc_type_var = self.prop_vars['barcode_type'] = tk.StringVar()
+        bc_type_combo = ctk.CTkComboBox(bc_type_row, values=['CODE128', 'CODE39', 'EAN13', 'EAN8', 'UPCA'], variable=bc_type_var, fg_color=WHITE_COLOR, button_color=PRIMARY_COLOR, button_hover_color=HIGHLIGHT_COLOR, text_color=TEXT_COLOR, width=PROPERTY_INPUT_WIDTH, command=lambda v: self.update_head_property('barcode_type', v))
+        bc_type_combo.grid(row=0, column=1, sticky="ew")
+        self.property_entry(self.bc_section, "Barcode Space (px)", 'barcode_space', sticky="ew")
+        self.property_entry(self.bc_section, "Barcode Height", 'barcode_height', sticky="ew")
+        self.property_entry(self.bc_section, "Barcode Width", 'barcode_width', sticky="ew")
+        self.property_check(self.bc_section, "Display Value", 'barcode_display_value')
+        self.property_entry(self.bc_section, "Barcode Text Space (px)", 'barcode_text_space', sticky="ew")
+
+        self.props_head = None
+
+    def property_entry(self, parent, text, prop, numeric=True, sticky="e"):
+        """Labelled entry row editing one property of the selected head"""
+        row = ctk.CTkFrame(parent, fg_color="transparent")
+        row.pack(fill="x", padx=10, pady=2)
+        row.grid_columnconfigure(1, weight=1)
+        label = ctk.CTkLabel(row, text=text, text_color=TEXT_COLOR, anchor="w")
+        label.grid(row=0, column=0, sticky="w", padx=(0, 5))
+        var = self.prop_vars[prop] = tk.StringVar()
+        entry = ctk.CTkEntry(row, textvariable=var, fg_color=WHITE_COLOR, border_color="#d1d5db", text_color=TEXT_COLOR, width=PROPERTY_INPUT_WIDTH)
+        entry.grid(row=0, column=1, sticky=sticky)
+        if numeric:
+            entry.configure(validate="key", validatecommand=(self.root.register(self.validate_numeric_input), '%P'))
+        entry.bind('<KeyRelease>', lambda e: self.update_head_property(prop, var.get()))
+        return row
+
+    def property_check(self, parent, text, prop):
+        """Checkbox row toggling one boolean property of the selected head"""
+        row = ctk.CTkFrame(parent, fg_color="transparent")
+        row.pack(fill="x", padx=10, pady=2)
+        row.grid_columnconfigure(1, weight=1)
+        var = self.prop_vars[prop] = tk.BooleanVar()
+        check = ctk.CTkCheckBox(row, text="", variable=var, fg_color=PRIMARY_COLOR, hover_color=HIGHLIGHT_COLOR, command=lambda: self.update_head_property(prop, var.get()))
+        check.grid(row=0, column=0, sticky="w", padx=(0, 5))
+        label = ctk.CTkLabel(row, text=text, text_color=TEXT_COLOR, anchor="w")
+        label.grid(row=0, column=1, sticky="w")
+        return row
+
+    def update_properties_panel(self, head):
+        """Show head's values in the prebuilt property widgets (None clears the panel)"""
+        if not head:
+            if self.props_head is not False:
+                self.props_fields.pack_forget()
+                self.props_empty_label.pack(expand=True)
+                self.props_head = False
+            return
+        if not self.props_head:
+            self.props_empty_label.pack_forget()
+            self.props_fields.pack(fill="both", expand=True)
+        self.props_head = head
+
+        for prop, var in self.prop_vars.items():
+            value = head[prop]
+            var.set(value if isinstance(var, tk.BooleanVar) else str(value))
+        self.rot_slider.set(head['rotation'])
+        self.rot_value_label.configure(text=f"{head['rotation']}°")
+        self.update_format_buttons(head)
+        self.update_symbol_sections(head)
+
+    def update_format_buttons(self, head):
+        for fmt, btn in self.format_buttons.items():
+            if self.format_states[fmt] != head[fmt]:
+                self.format_states[fmt] = head[fmt]
+                btn.configure(fg_color=PRIMARY_COLOR if head[fmt] else WHITE_COLOR, text_color=WHITE_COLOR if head[fmt] else TEXT_COLOR)
+
+    def update_symbol_sections(self, head):
+        """Show the QR code and barcode settings only for the symbols the head has"""
+        for section, row, shown in ((self.qr_section, self.qr_row, head['show_qr']), (self.bc_section, self.bc_row, head['show_barcode'])):
+            if shown and not section.winfo_manager():
+                section.pack(fill="x", after=row)
+            elif not shown and section.winfo_manager():
+                section.pack_forget()
 
     def toggle_format(self, fmt):
         if self.selected_head_id is not None:
             head = self.numbering_heads[self.selected_head_id]
             head[fmt] = not head[fmt]
-            self.update_properties_panel(head)
+            self.update_format_buttons(head)
             self.update_preview()
 
     def update_head_property(self, prop, value):
@@ -1223,61 +1257,87 @@ class NumberingSystemApp:
                     head[prop] = value
                 else:
                     head[prop] = value
-                if prop in ['show_qr', 'show_barcode', 'barcode_display_value']:
-                    self.update_properties_panel(head)
-                self.update_preview()
+                if prop in ['show_qr', 'show_barcode']:
+                    self.update_symbol_sections(head)
+                self.schedule_preview()
             except (ValueError, tk.TclError):
                 pass
 
+    def get_numbering_settings(self):
+        """Read the numbering StringVars once into plain values for the engine"""
+        return {
+            'start': parse_int(self.start_num_var.get(), 1),
+            'step': parse_int(self.step_var.get(), 1),
+            'total': parse_int(self.total_pages_var.get(), 10),
+            'copies': parse_int(self.copies_var.get(), 1),
+            'collate': self.collate_var.get(),
+            'skip': parse_int(self.skip_var.get(), 0),
+            'order': self.order_var.get()
+        }
+
+    def build_job(self):
+        """Snapshot the current layout as a headless NumberingJob"""
+        paper = {
+            'size': self.paper_var.get(),
+            'orientation': self.paper_orientation,
+            'rotation': self.paper_rotation,
+            'bg_color': self.bg_color_var.get(),
+            'background_image': self.background_path
+        }
+        return NumberingJob([dict(h) for h in self.numbering_heads], self.get_numbering_settings(), paper)
+
     def calculate_number_for_page(self, page):
         try:
-            start_str = self.start_num_var.get()
-            step_str = self.step_var.get()
-            skip_str = self.skip_var.get()
-            total_str = self.total_pages_var.get()
-            
-            start = int(start_str) if start_str.strip() != "" else 1
-            step = int(step_str) if step_str.strip() != "" else 1
-            skip = int(skip_str) if skip_str.strip() != "" else 0
-            total = int(total_str) if total_str.strip() != "" else 10
-            
-            order = "asc" if self.order_var.get() == "Ascending" else "desc"
+            settings = self.get_numbering_settings()
+            return number_for_page(page, settings['start'], settings['step'], settings['skip'], settings['total'], settings['order'])
+        except (ValueError, tk.TclError):
+            return 1
 
-            if order == "asc":
-                number = start + (page - 1) * step
-            else:
-                number = start + (total - page) * step
+    def schedule_preview(self, delay=PREVIEW_DEBOUNCE_MS):
+        """Coalesce bursts of edits into one preview render.
+
+        Each call supersedes the pending render; a delay of 0 renders on the
+        next idle turn instead of after the debounce interval.
+        """
+        self.preview_generation += 1
+        generation = self.preview_generation
+        if self.preview_after_id is not None:
+            self.root.after_cancel(self.preview_after_id)
+        if delay:
+            self.preview_after_id = self.root.after(delay, lambda: self.run_scheduled_preview(generation))
+        else:
+            self.preview_after_id = self.root.after_idle(lambda: self.run_scheduled_preview(generation))
 
-            if skip > 0 and number >= skip:
-                number += math.floor((number - skip) / skip) + 1
+    def run_scheduled_preview(self, generation):
+        self.preview_after_id = None
+        # Drop renders that newer input has already made stale
+        if generation != self.preview_generation:
+            return
+        self.update_preview()
 
-            return number
-        except (ValueError, tk.TclError):
-            return 1
+    def cancel_scheduled_preview(self):
+        if self.preview_after_id is not None:
+            self.root.after_cancel(self.preview_after_id)
+            self.preview_after_id = None
 
     def update_preview(self):
+        with span("preview.update"):
+            self.render_preview()
+
+    def render_preview(self):
+        # A direct render covers any pending scheduled one
+        self.cancel_scheduled_preview()
         bg_color = self.bg_color_var.get()
         self.preview_canvas.configure(bg=bg_color)
         self.preview_container.configure(bg=bg_color)
 
-        self.preview_canvas.delete("content")
-
-        # Clear image references to prevent memory leaks
-        for key in list(self.image_references.keys()):
-            if 'head' in key or 'qr' in key or 'bc' in key:
-                del self.image_references[key]
-
         page_num = self.calculate_number_for_page(self.current_page)
 
+        live_heads = set()
         for head in [h for h in self.numbering_heads if h['selected']]:
-            seed_str = head['seed']
-            seed = int(seed_str) if seed_str and seed_str.strip() != '' else 0
-            final_num = page_num + seed
-            formatted = str(final_num).zfill(head['zero_pad']) if head['zero_pad'] > 0 else str(final_num)
-            full_text = head['prefix']
-            if head['add_space_after_prefix'] and head['prefix']:
-                full_text += " "
-            full_text += formatted + head['suffix']
+            full_text = format_head_text(head, page_num)
+            live_heads.add(id(head))
+            entry = self.preview_scene.setdefault(id(head), {'items': {}, 'photos': {}})
 
             # Scaled positions and sizes
             scaled_x = head['x'] * self.zoom_level
@@ -1289,93 +1349,102 @@ class NumberingSystemApp:
             if head['italic']:
                 font_list = font_list + ('italic',)
             text_color = BLACK_COLOR
-            self.preview_canvas.create_text(scaled_x, scaled_y, text=full_text, font=font_list, tags=(f"head_{head['id']}", "content"), fill=text_color)
+            self.set_scene_item(entry, 'head', 'text', head, (scaled_x, scaled_y), {'text': full_text, 'font': font_list, 'fill': text_color})
 
             # QR Code
+            qr_shown = False
             if head['show_qr'] and full_text.strip() != '':
                 try:
-                    qr = qrcode.QRCode(version=1, box_size=10, border=1)
-                    qr.add_data(full_text)
-                    qr.make(fit=True)
-                    qr_img = qr.make_image(fill_color="black", back_color="white")
-                    
                     base_size = max(head['qr_size'], 10)
                     scaled_qr_size = int(base_size * self.zoom_level)
-                    qr_scaled = qr_img.resize((scaled_qr_size, scaled_qr_size), Image.Resampling.NEAREST)
-                    
-                    qr_photo = ImageTk.PhotoImage(qr_scaled)
-                    qr_key = f"qr_{head['id']}"
-                    self.image_references[qr_key] = qr_photo
-                    
+                    with span("preview.qr"):
+                        qr_scaled = self.symbol_cache.qr_scaled(full_text, scaled_qr_size)
+                    qr_photo = self.scene_photo(entry, 'qr', qr_scaled)
+
                     qr_offset_y = scaled_y + head['size'] * self.zoom_level + head['qr_space'] * self.zoom_level
-                    self.preview_canvas.create_image(scaled_x, qr_offset_y, image=qr_photo, tags=(f"qr_{head['id']}", "content"))
+                    self.set_scene_item(entry, 'qr', 'image', head, (scaled_x, qr_offset_y), {'image': qr_photo})
+                    qr_shown = True
                 except Exception as e:
                     print(f"QR error: {e}")
+            if not qr_shown:
+                self.drop_scene_item(entry, 'qr')
 
             # Barcode - FIXED: barcode_text_space အလုပ်လုပ်အောင်ပြင်ဆင်
+            bc_shown = bc_text_shown = False
             if head['show_barcode'] and full_text.strip() != '':
                 try:
-                    # Generate barcode directly to memory without text
-                    barcode_data = full_text
-                    barcode_class = {
-                        'CODE128': Code128,
-                        'CODE39': Code39,
-                        'EAN13': EAN13,
-                        'EAN8': EAN8,
-                        'UPCA': UPCA
-                    }.get(head['barcode_type'], Code128)
-                    
-                    # Create barcode with custom writer settings, no text
-                    writer = ImageWriter()
-                    writer.set_options({
-                        'module_width': head['barcode_width'],
-                        'module_height': head['barcode_height'],
-                        'font_size': 0,
-                        'text_distance': 0,
-                        'quiet_zone': 6,
-                        'write_text': False
-                    })
-                    
-                    # Generate barcode to bytes buffer
-                    bc = barcode_class(barcode_data, writer=writer)
-                    buffer = io.BytesIO()
-                    bc.write(buffer)
-                    buffer.seek(0)
-                    
-                    # Load and scale barcode image (bars only)
-                    bc_img = Image.open(buffer)
-                    
-                    # Calculate scaled dimensions
-                    base_width = max(int(bc_img.width * self.zoom_level), 10)
-                    base_height = max(int(bc_img.height * self.zoom_level), 10)
-                    
-                    bc_img = bc_img.resize((base_width, base_height), Image.Resampling.NEAREST)
-                    bc_photo = ImageTk.PhotoImage(bc_img)
-                    
-                    bc_key = f"bc_{head['id']}"
-                    self.image_references[bc_key] = bc_photo
-                    
+                    # Bars-only barcode from the cache, scaled for the zoom level
+                    with span("preview.barcode"):
+                        bc_img = self.symbol_cache.barcode_scaled(full_text, head['barcode_type'], head['barcode_width'], head['barcode_height'], self.zoom_level)
+                    base_height = bc_img.height
+                    bc_photo = self.scene_photo(entry, 'bc', bc_img)
+
                     # Position for barcode image
                     bc_offset_y = scaled_y + head['size'] * self.zoom_level + head['barcode_space'] * self.zoom_level
-                    self.preview_canvas.create_image(scaled_x, bc_offset_y, image=bc_photo, tags=(f"bc_{head['id']}", "content"))
-                    
+                    self.set_scene_item(entry, 'bc', 'image', head, (scaled_x, bc_offset_y), {'image': bc_photo})
+                    bc_shown = True
+
                     # FIXED: Add value text below barcode with proper barcode_text_space
                     if head['barcode_display_value']:
                         value_font_size = int(10 * self.zoom_level)
                         # Use barcode_text_space for spacing between barcode and text
                         value_text_y = bc_offset_y + base_height + head['barcode_text_space'] * self.zoom_level
-                        self.preview_canvas.create_text(scaled_x, value_text_y, text=full_text, 
-                                                        font=("Arial", value_font_size), 
-                                                        fill=BLACK_COLOR, 
-                                                        tags=(f"bc_text_{head['id']}", "content"))
-                    
+                        self.set_scene_item(entry, 'bc_text', 'text', head, (scaled_x, value_text_y), {'text': full_text, 'font': ("Arial", value_font_size), 'fill': BLACK_COLOR})
+                        bc_text_shown = True
                 except Exception as e:
                     print(f"Barcode error: {e}")
+            if not bc_shown:
+                self.drop_scene_item(entry, 'bc')
+            if not bc_text_shown:
+                self.drop_scene_item(entry, 'bc_text')
+
+        # Remove items of heads that were deleted or deselected
+        for key in [key for key in self.preview_scene if key not in live_heads]:
+            entry = self.preview_scene.pop(key)
+            for name in list(entry['items']):
+                self.drop_scene_item(entry, name)
 
         total_pages_str = self.total_pages_var.get()
         total_pages = int(total_pages_str) if total_pages_str.strip() != "" else 10
         self.page_label.configure(text=f"Page {self.current_page} of {total_pages}")
 
+    def set_scene_item(self, entry, name, kind, head, coords, options):
+        """Create or update one canvas item of a head in the retained preview scene.
+
+        Tk is only called for the parts (coords, options, tags) that differ
+        from what the item already shows.
+        """
+        tags = (f"{name}_{head['id']}", "content")
+        item = entry['items'].get(name)
+        if item is None:
+            create = self.preview_canvas.create_text if kind == 'text' else self.preview_canvas.create_image
+            item_id = create(*coords, tags=tags, **options)
+            entry['items'][name] = (item_id, coords, options, tags)
+            return
+        item_id, old_coords, old_options, old_tags = item
+        if coords != old_coords:
+            self.preview_canvas.coords(item_id, *coords)
+        changed = {key: value for key, value in options.items() if old_options.get(key) != value}
+        if tags != old_tags:
+            changed['tags'] = tags
+        if changed:
+            self.preview_canvas.itemconfigure(item_id, **changed)
+        entry['items'][name] = (item_id, coords, options, tags)
+
+    def drop_scene_item(self, entry, name):
+        item = entry['items'].pop(name, None)
+        if item is not None:
+            self.preview_canvas.delete(item[0])
+        entry['photos'].pop(name, None)
+
+    def scene_photo(self, entry, name, image):
+        """PhotoImage for a cached bitmap, reused while the bitmap is unchanged"""
+        photo = entry['photos'].get(name)
+        if photo is None or photo[0] is not image:
+            photo = (image, ImageTk.PhotoImage(image))
+            entry['photos'][name] = photo
+        return photo[1]
+
     def start_drag(self, event):
         items = self.preview_canvas.find_closest(event.x, event.y)
         if items:
@@ -1432,130 +1501,167 @@ class NumberingSystemApp:
             self.update_preview()
 
     def print_preview(self):
-        """Implement print functionality by generating temp PDF and printing."""
-        temp_path = os.path.join(tempfile.gettempdir(), f"temp_print_{uuid.uuid4().hex[:8]}.pdf")
+        """Render the job to a temp PDF and print it on a background worker."""
         try:
-            packet = io.BytesIO()
-            # Paper size
-            pagesize = A4
-            if self.paper_var.get() == 'A3':
-                pagesize = A3
-            elif self.paper_var.get() == 'Letter':
-                pagesize = letter
-            elif self.paper_var.get() == 'Legal':
-                pagesize = legal
-
-            p = canvas.Canvas(packet, pagesize=pagesize)
-            width, height = pagesize
-
-            total_pages_str = self.total_pages_var.get()
-            total_pages = int(total_pages_str) if total_pages_str.strip() != "" else 10
-            
-            for page in range(1, total_pages + 1):
-                if page > 1:
-                    p.showPage()
-
-                p.setFillColor(HexColor(self.bg_color_var.get()))
-                p.rect(0, 0, width, height, fill=1, stroke=0)
-
-                page_num = self.calculate_number_for_page(page)
-                for head in [h for h in self.numbering_heads if h['selected']]:
-                    seed_str = head['seed']
-                    seed = int(seed_str) if seed_str and seed_str.strip() != '' else 0
-                    final_num = page_num + seed
-                    formatted = str(final_num).zfill(head['zero_pad']) if head['zero_pad'] > 0 else str(final_num)
-                    full_text = head['prefix']
-                    if head['add_space_after_prefix'] and head['prefix']:
-                        full_text += " "
-                    full_text += formatted + head['suffix']
-
-                    pdf_font = self.get_pdf_font(head)
-                    p.setFont(pdf_font, head['size'])
-                    p.drawString(head['x'], height - head['y'], full_text)
-
-            p.save()
-            packet.seek(0)
-
-            with open(temp_path, "wb") as f:
-                f.write(packet.getvalue())
-
-            # Platform-specific print with better error handling
-            sys_name = platform.system()
-            print_success = False
-            print_error_msg = ""
-            
+            job = self.build_job()
+        except (ValueError, tk.TclError) as e:
+            messagebox.showerror("Print Error", f"Failed to create PDF:\n{str(e)}")
+            return
+        chunk_pages = SPOOL_OPTIONS.get(self.spool_var.get(), 0)
+        printer = self.selected_printer()
+        if 0 < chunk_pages < job.total:
+            self.show_spool_window(SpoolWorker(job, chunk_pages, printer))
+            return
+        self.start_background_job(PrintWorker(job, printer), "Printing", "Rendering", self.finish_print_job)
+
+    def start_background_job(self, worker, title, verb, on_finish):
+        """Start a worker with a non-modal progress window; on_finish gets its final message"""
+        self.show_progress_window(worker, title, verb)
+        worker.start()
+        self.root.after(PROGRESS_POLL_MS, lambda: self.poll_worker(worker, on_finish))
+
+    def show_progress_window(self, worker, title, verb):
+        """Non-modal progress window so the layout stays editable while a job runs"""
+        dialog = ctk.CTkToplevel(self.root)
+        dialog.title(title)
+        dialog.geometry("360x140")
+        dialog.transient(self.root)
+
+        status_label = ctk.CTkLabel(dialog, text=f"{verb} pages...", text_color=TEXT_COLOR, anchor="w")
+        status_label.pack(fill="x", padx=20, pady=(20, 5))
+        progress_bar = ctk.CTkProgressBar(dialog, progress_color=PRIMARY_COLOR)
+        progress_bar.set(0)
+        progress_bar.pack(fill="x", padx=20, pady=5)
+
+        def cancel():
+            worker.cancel()
+            status_label.configure(text="Cancelling...")
+            cancel_btn.configure(state="disabled")
+
+        cancel_btn = ctk.CTkButton(dialog, text="Cancel", command=cancel, fg_color=DANGER_COLOR, hover_color="#dc2626", width=100)
+        cancel_btn.pack(pady=(5, 15))
+        dialog.protocol("WM_DELETE_WINDOW", cancel)
+        self.progress_windows[worker] = (dialog, status_label, progress_bar, verb)
+
+    def poll_worker(self, worker, on_finish):
+        """Apply the worker's queued messages to its progress window"""
+        dialog, status_label, progress_bar, verb = self.progress_windows[worker]
+        while True:
             try:
-                if sys_name == "Windows":
-                    if os.path.exists(temp_path):
-                        os.startfile(temp_path, "print")
-                        print_success = True
-                    else:
-                        raise FileNotFoundError("PDF file not created")
-                        
-                elif sys_name == "Darwin":
-                    result = subprocess.run(["lpr", temp_path], capture_output=True, text=True, timeout=30)
-                    if result.returncode == 0:
-                        print_success = True
-                    else:
-                        print_error_msg = f"lpr failed: {result.stderr}"
-                        
-                else:
-                    try:
-                        lpstat_result = subprocess.run(["lpstat", "-p"], capture_output=True, text=True, timeout=10)
-                        if lpstat_result.returncode == 0:
-                            printers = [line.split()[1] for line in lpstat_result.stdout.split('\n') if line.startswith('printer')]
-                        else:
-                            printers = []
-                    except:
-                        printers = []
-                    
-                    if printers:
-                        for printer in printers:
-                            try:
-                                result = subprocess.run(["lp", "-d", printer, temp_path], 
-                                                      capture_output=True, text=True, timeout=30)
-                                if result.returncode == 0:
-                                    print_success = True
-                                    break
-                            except:
-                                continue
-                    
-                    if not print_success:
-                        try:
-                            result = subprocess.run(["lpr", temp_path], capture_output=True, text=True, timeout=30)
-                            if result.returncode == 0:
-                                print_success = True
-                            else:
-                                print_error_msg = f"lpr failed: {result.stderr}"
-                        except Exception as e:
-                            print_error_msg = f"lpr failed: {str(e)}"
-                    
-                    if not print_success:
-                        try:
-                            if os.path.exists('/usr/bin/xdg-open'):
-                                subprocess.run(["xdg-open", temp_path], timeout=30)
-                                print_success = True
-                            elif os.path.exists('/usr/bin/evince'):
-                                subprocess.run(["evince", "--print", temp_path], timeout=30)
-                                print_success = True
-                        except:
-                            pass
+                message = worker.messages.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == 'progress':
+                _, done, total = message
+                progress_bar.set(done / total if total else 1)
+                status_label.configure(text=f"{verb} page {done} of {total}")
+            elif kind == 'spooling':
+                progress_bar.set(1)
+                status_label.configure(text="Sending to printer...")
+            else:
+                self.progress_windows.pop(worker)[0].destroy()
+                on_finish(worker, message)
+                return
+        self.root.after(PROGRESS_POLL_MS, lambda: self.poll_worker(worker, on_finish))
+
+    def finish_print_job(self, worker, message):
+        kind = message[0]
+        if kind == 'done':
+            temp_path = message[1]
+            messagebox.showinfo("Print", "Document sent to printer successfully!")
+            self.root.after(3000, lambda: self.cleanup_temp_file(temp_path))
+        elif kind == 'failed':
+            self.handle_print_failure(message[1], message[2])
+        elif kind == 'error':
+            messagebox.showerror("Print Error", f"Failed to create PDF:\n{message[1]}")
+
+    def show_spool_window(self, worker):
+        """Chunk-by-chunk print status with a retry button for each failed chunk"""
+        dialog = ctk.CTkToplevel(self.root)
+        dialog.title("Spooling")
+        dialog.geometry("420x460")
+        dialog.transient(self.root)
 
-                if print_success:
-                    messagebox.showinfo("Print", "Document sent to printer successfully!")
-                    self.root.after(3000, lambda: self.cleanup_temp_file(temp_path))
+        status_label = ctk.CTkLabel(dialog, text="Rendering pages...", text_color=TEXT_COLOR, anchor="w")
+        status_label.pack(fill="x", padx=20, pady=(20, 5))
+        progress_bar = ctk.CTkProgressBar(dialog, progress_color=PRIMARY_COLOR)
+        progress_bar.set(0)
+        progress_bar.pack(fill="x", padx=20, pady=5)
+
+        chunk_frame = ctk.CTkScrollableFrame(dialog, fg_color=WHITE_COLOR)
+        chunk_frame.pack(fill="both", expand=True, padx=20, pady=5)
+        chunk_rows = []
+        for index, chunk in enumerate(worker.chunks):
+            row = ctk.CTkFrame(chunk_frame, fg_color="transparent")
+            row.pack(fill="x", pady=1)
+            chunk_text = f"Pages {chunk['first']}-{chunk['last']}"
+            if worker.copies > 1:
+                chunk_text += f" (copy {chunk['copy']})"
+            ctk.CTkLabel(row, text=chunk_text, text_color=TEXT_COLOR, width=150, anchor="w").pack(side="left")
+            chunk_status = ctk.CTkLabel(row, text="Pending", text_color=SECONDARY_COLOR, anchor="w")
+            chunk_status.pack(side="left", fill="x", expand=True)
+            retry_btn = ctk.CTkButton(row, text="Retry", fg_color=WARNING_COLOR, hover_color="#d97706", width=60,
+                                      command=lambda i=index: self.retry_spool_chunk(worker, i))
+            chunk_rows.append((chunk_status, retry_btn))
+
+        btn_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+        btn_frame.pack(pady=(5, 15))
+        cancel_btn = ctk.CTkButton(btn_frame, text="Cancel", command=worker.cancel, fg_color=DANGER_COLOR, hover_color="#dc2626", width=100)
+        cancel_btn.pack(side="left", padx=5)
+        close_btn = ctk.CTkButton(btn_frame, text="Close", command=lambda: self.close_spool_window(worker), fg_color=SECONDARY_COLOR, hover_color="#4b5563", width=100)
+        close_btn.pack(side="left", padx=5)
+        dialog.protocol("WM_DELETE_WINDOW", lambda: self.close_spool_window(worker))
+
+        self.spool_windows[worker] = (dialog, status_label, progress_bar, chunk_rows, cancel_btn)
+        worker.start()
+        self.root.after(PROGRESS_POLL_MS, lambda: self.poll_spool_worker(worker))
+
+    def poll_spool_worker(self, worker):
+        """Apply spooler messages; keeps polling until the window is closed so retries show up"""
+        if worker not in self.spool_windows:
+            return
+        dialog, status_label, progress_bar, chunk_rows, cancel_btn = self.spool_windows[worker]
+        while True:
+            try:
+                message = worker.messages.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == 'progress':
+                _, done, total = message
+                progress_bar.set(done / total if total else 1)
+                status_label.configure(text=f"Rendering page {done} of {total}")
+            elif kind == 'chunk':
+                _, index, status, error = message
+                chunk_status, retry_btn = chunk_rows[index]
+                color = {'printed': SUCCESS_COLOR, 'failed': DANGER_COLOR}.get(status, TEXT_COLOR)
+                chunk_status.configure(text=f"{status.capitalize()}: {error}" if error else status.capitalize(), text_color=color)
+                if status == 'failed':
+                    retry_btn.pack(side="right")
                 else:
-                    self.handle_print_failure(temp_path, print_error_msg)
-                    
-            except subprocess.TimeoutExpired:
-                self.handle_print_failure(temp_path, "Print operation timed out")
-            except Exception as print_error:
-                self.handle_print_failure(temp_path, str(print_error))
-                
-        except Exception as e:
-            messagebox.showerror("Print Error", f"Failed to create PDF:\n{str(e)}")
-            if os.path.exists(temp_path):
-                self.cleanup_temp_file(temp_path)
+                    retry_btn.pack_forget()
+            else:
+                cancel_btn.configure(state="disabled")
+                progress_bar.set(1)
+                if kind == 'done':
+                    failed = message[1]
+                    status_label.configure(text=f"{failed} chunk(s) failed - retry them below" if failed else "All chunks sent to printer")
+                elif kind == 'cancelled':
+                    status_label.configure(text="Spooling cancelled")
+                elif kind == 'error':
+                    status_label.configure(text="Failed to create PDF")
+                    messagebox.showerror("Print Error", f"Failed to create PDF:\n{message[1]}", parent=dialog)
+        self.root.after(PROGRESS_POLL_MS, lambda: self.poll_spool_worker(worker))
+
+    def retry_spool_chunk(self, worker, index):
+        worker.resubmit(index)
+
+    def close_spool_window(self, worker):
+        worker.cancel()
+        dialog = self.spool_windows.pop(worker)[0]
+        dialog.destroy()
+        self.root.after(3000, worker.remove_files)
 
     def handle_print_failure(self, temp_path, error_msg):
         """Handle print failure by offering options to user."""
@@ -1687,86 +1793,64 @@ class NumberingSystemApp:
         path_label.pack(pady=(10, 5))
 
     def export_images(self):
-        """Export QR codes and barcodes as separate image files"""
+        """Export QR codes and barcodes as separate image files, one archive or label sheets"""
+        from image_export import ImageExportWorker, ARCHIVE_FORMATS
+
+        output_format = self.image_output_var.get().lower()
+        if output_format in ARCHIVE_FORMATS:
+            target = filedialog.asksaveasfilename(
+                defaultextension=f".{output_format}",
+                filetypes=[(f"{output_format.upper()} archives", f"*.{output_format}")],
+                title="Save Images As"
+            )
+        elif output_format == "tiff":
+            target = filedialog.asksaveasfilename(
+                defaultextension=".tif",
+                filetypes=[("TIFF images", "*.tif *.tiff")],
+                title="Save Label Sheets As"
+            )
+        else:
+            if output_format != "sheets":
+                output_format = None
+            target = filedialog.askdirectory(title="Select Export Directory")
+        if not target:
+            return
         try:
-            export_dir = filedialog.askdirectory(title="Select Export Directory")
-            if not export_dir:
+            job = self.build_job()
+        except (ValueError, tk.TclError) as e:
+            messagebox.showerror("Export Error", f"Failed to export images:\n{str(e)}")
+            return
+        worker = ImageExportWorker(job, target, output_format=output_format)
+        self.start_background_job(worker, "Exporting Images", "Exporting", self.finish_image_export)
+
+    def finish_image_export(self, worker, message):
+        kind = message[0]
+        if kind == 'done':
+            _, exported_qr, exported_barcodes = message
+            skipped = sum(count for count, _ in worker.failures.values())
+            if exported_qr + exported_barcodes == 0:
+                messagebox.showinfo("Export Complete", "No images were exported: no selected head has a QR code or barcode to write."
+                                    + (f"\n\nSkipped: {skipped} values that could not be encoded" if skipped else ""))
                 return
-            
-            qr_dir = Path(export_dir) / "QR_Codes"
-            barcode_dir = Path(export_dir) / "Barcodes"
-            
-            qr_dir.mkdir(exist_ok=True)
-            barcode_dir.mkdir(exist_ok=True)
-            
-            total_pages_str = self.total_pages_var.get()
-            total_pages = int(total_pages_str) if total_pages_str.strip() != "" else 10
-            
-            exported_qr = 0
-            exported_barcodes = 0
-            
-            for page in range(1, total_pages + 1):
-                page_num = self.calculate_number_for_page(page)
-                
-                for head in [h for h in self.numbering_heads if h['selected']]:
-                    seed_str = head['seed']
-                    seed = int(seed_str) if seed_str and seed_str.strip() != '' else 0
-                    final_num = page_num + seed
-                    formatted = str(final_num).zfill(head['zero_pad']) if head['zero_pad'] > 0 else str(final_num)
-                    full_text = head['prefix']
-                    if head['add_space_after_prefix'] and head['prefix']:
-                        full_text += " "
-                    full_text += formatted + head['suffix']
-                    
-                    # Export QR Code
-                    if head['show_qr'] and full_text.strip() != '':
-                        try:
-                            qr = qrcode.QRCode(version=1, box_size=10, border=1)
-                            qr.add_data(full_text)
-                            qr.make(fit=True)
-                            qr_img = qr.make_image(fill_color="black", back_color="white")
-                            
-                            qr_filename = f"{head['name']}_page{page}_{full_text}.png"
-                            qr_filepath = qr_dir / qr_filename
-                            qr_img.save(qr_filepath)
-                            exported_qr += 1
-                        except Exception as e:
-                            print(f"QR export error: {e}")
-                    
-                    # Export Barcode
-                    if head['show_barcode'] and full_text.strip() != '':
-                        try:
-                            barcode_data = full_text
-                            if head['barcode_type'] == 'CODE128':
-                                bc = Code128(barcode_data, writer=ImageWriter())
-                            elif head['barcode_type'] == 'CODE39':
-                                bc = Code39(barcode_data, writer=ImageWriter())
-                            elif head['barcode_type'] == 'EAN13':
-                                bc = EAN13(barcode_data, writer=ImageWriter())
-                            elif head['barcode_type'] == 'EAN8':
-                                bc = EAN8(barcode_data, writer=ImageWriter())
-                            elif head['barcode_type'] == 'UPCA':
-                                bc = UPCA(barcode_data, writer=ImageWriter())
-                            else:
-                                bc = Code128(barcode_data, writer=ImageWriter())
-                            
-                            barcode_filename = f"{head['name']}_page{page}_{full_text}.png"
-                            barcode_filepath = barcode_dir / barcode_filename
-                            bc.save(barcode_filepath)
-                            exported_barcodes += 1
-                        except Exception as e:
-                            print(f"Barcode export error: {e}")
-            
             messagebox.showinfo(
                 "Export Complete", 
                 f"Images exported successfully!\n\n"
                 f"QR Codes: {exported_qr} files\n"
+                f"Barcodes: {exported_barcodes} files\n"
+                + (f"Skipped: {skipped} values that could not be encoded\n" if skipped else "")
+                + f"\nLocation: {worker.target}"
+            )
+        elif kind == 'cancelled':
+            _, exported_qr, exported_barcodes = message
+            messagebox.showinfo(
+                "Export Cancelled",
+                f"Export cancelled.\n\n"
+                f"QR Codes: {exported_qr} files\n"
                 f"Barcodes: {exported_barcodes} files\n\n"
-                f"Location: {export_dir}"
+                f"Location: {worker.target}"
             )
-            
-        except Exception as e:
-            messagebox.showerror("Export Error", f"Failed to export images:\n{str(e)}")
+        elif kind == 'error':
+            messagebox.showerror("Export Error", f"Failed to export images:\n{message[1]}")
 
     def export_pdf(self):
         file_path = filedialog.asksaveasfilename(
@@ -1778,52 +1862,156 @@ class NumberingSystemApp:
             return
 
         try:
-            packet = io.BytesIO()
-            pagesize = A4
-            if self.paper_var.get() == 'A3':
-                pagesize = A3
-            elif self.paper_var.get() == 'Letter':
-                pagesize = letter
-            elif self.paper_var.get() == 'Legal':
-                pagesize = legal
-
-            p = canvas.Canvas(packet, pagesize=pagesize)
-            width, height = pagesize
-
-            total_pages_str = self.total_pages_var.get()
-            total_pages = int(total_pages_str) if total_pages_str.strip() != "" else 10
-            
-            for page in range(1, total_pages + 1):
-                if page > 1:
-                    p.showPage()
-
-                p.setFillColor(HexColor(self.bg_color_var.get()))
-                p.rect(0, 0, width, height, fill=1, stroke=0)
-
-                page_num = self.calculate_number_for_page(page)
-                for head in [h for h in self.numbering_heads if h['selected']]:
-                    seed_str = head['seed']
-                    seed = int(seed_str) if seed_str and seed_str.strip() != '' else 0
-                    final_num = page_num + seed
-                    formatted = str(final_num).zfill(head['zero_pad']) if head['zero_pad'] > 0 else str(final_num)
-                    full_text = head['prefix']
-                    if head['add_space_after_prefix'] and head['prefix']:
-                        full_text += " "
-                    full_text += formatted + head['suffix']
-
-                    pdf_font = self.get_pdf_font(head)
-                    p.setFont(pdf_font, head['size'])
-                    p.drawString(head['x'], height - head['y'], full_text)
-
-            p.save()
-            packet.seek(0)
-
-            with open(file_path, "wb") as f:
-                f.write(packet.getvalue())
-
-            messagebox.showinfo("PDF Export", f"PDF exported successfully to:\n{file_path}")
-        except Exception as e:
+            job = self.build_job()
+        except (ValueError, tk.TclError) as e:
             messagebox.showerror("Export Error", f"Failed to export PDF:\n{str(e)}")
+            return
+        self.start_background_job(PdfExportWorker(job, file_path), "Exporting PDF", "Rendering", self.finish_pdf_export)
+
+    def finish_pdf_export(self, worker, message):
+        kind = message[0]
+        if kind == 'done':
+            messagebox.showinfo("PDF Export", f"PDF exported successfully to:\n{message[1]}")
+        elif kind == 'error':
+            messagebox.showerror("Export Error", f"Failed to export PDF:\n{message[1]}")
+
+    def show_diagnostics(self):
+        """Stage timings of the opt-in profiler, with a Chrome trace export"""
+        if self.diagnostics_window is not None:
+            self.diagnostics_window[0].lift()
+            return
+        dialog = ctk.CTkToplevel(self.root)
+        dialog.title("Diagnostics")
+        dialog.geometry("560x380")
+        dialog.transient(self.root)
+
+        enabled_var = tk.BooleanVar(value=profiler.enabled)
+        enabled_check = ctk.CTkCheckBox(dialog, text="Record stage timings", variable=enabled_var, command=lambda: profiler.enable(enabled_var.get()),
+                                        fg_color=PRIMARY_COLOR, hover_color=HIGHLIGHT_COLOR, text_color=TEXT_COLOR)
+        enabled_check.pack(anchor="w", padx=20, pady=(20, 5))
+
+        stats_box = ctk.CTkTextbox(dialog, font=ctk.CTkFont(family="Courier New", size=12), fg_color=WHITE_COLOR, text_color=TEXT_COLOR, wrap="none")
+        stats_box.pack(fill="both", expand=True, padx=20, pady=5)
+
+        btn_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+        btn_frame.pack(pady=(5, 15))
+        reset_btn = ctk.CTkButton(btn_frame, text="Reset", command=lambda: (profiler.reset(), self.refresh_diagnostics()), fg_color=WARNING_COLOR, hover_color="#d97706", width=100)
+        reset_btn.pack(side="left", padx=5)
+        save_btn = ctk.CTkButton(btn_frame, text="Save Trace", command=self.save_trace, fg_color=PRIMARY_COLOR, hover_color=HIGHLIGHT_COLOR, width=100)
+        save_btn.pack(side="left", padx=5)
+        close_btn = ctk.CTkButton(btn_frame, text="Close", command=self.close_diagnostics, fg_color=SECONDARY_COLOR, hover_color="#4b5563", width=100)
+        close_btn.pack(side="left", padx=5)
+        dialog.protocol("WM_DELETE_WINDOW", self.close_diagnostics)
+
+        self.diagnostics_window = (dialog, stats_box, self.root.after(DIAGNOSTICS_REFRESH_MS, self.refresh_diagnostics))
+        self.refresh_diagnostics()
+
+    def refresh_diagnostics(self):
+        if self.diagnostics_window is None:
+            return
+        dialog, stats_box, refresh_id = self.diagnostics_window
+        self.root.after_cancel(refresh_id)
+        lines = [f"{'Stage':<20}{'Count':>8}{'Total ms':>12}{'Mean ms':>10}{'Max ms':>10}"]
+        for name, count, total, mean, _, high in profiler.summary():
+            lines.append(f"{name:<20}{count:>8}{total:>12.1f}{mean:>10.2f}{high:>10.2f}")
+        if len(lines) == 1:
+            lines.append("No spans recorded" if profiler.enabled else "Recording is off")
+        stats_box.configure(state="normal")
+        stats_box.delete("1.0", "end")
+        stats_box.insert("1.0", "\n".join(lines))
+        stats_box.configure(state="disabled")
+        self.diagnostics_window = (dialog, stats_box, self.root.after(DIAGNOSTICS_REFRESH_MS, self.refresh_diagnostics))
+
+    def close_diagnostics(self):
+        dialog, _, refresh_id = self.diagnostics_window
+        self.root.after_cancel(refresh_id)
+        self.diagnostics_window = None
+        dialog.destroy()
+
+    def save_trace(self):
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Chrome trace", "*.json")],
+            title="Save Trace As"
+        )
+        if not file_path:
+            return
+        try:
+            profiler.dump_trace(file_path)
+        except OSError as e:
+            messagebox.showerror("Diagnostics", f"Failed to save trace:\n{str(e)}")
+
+    def save_project(self):
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=PROJECT_EXTENSION,
+            filetypes=[("Numbering projects", f"*{PROJECT_EXTENSION}"), ("Binary numbering projects", f"*{BINARY_PROJECT_EXTENSION}")],
+            title="Save Project As"
+        )
+        if not file_path:
+            return
+        try:
+            job = self.build_job()
+            job.paper.update({
+                'custom_width': self.paper_width_var.get(),
+                'custom_height': self.paper_height_var.get(),
+                'custom_unit': self.paper_unit_var.get()
+            })
+            save_project(job, file_path)
+        except (OSError, ValueError, tk.TclError) as e:
+            messagebox.showerror("Save Project", f"Failed to save project:\n{str(e)}")
+
+    def open_project(self):
+        file_path = filedialog.askopenfilename(
+            filetypes=[("Numbering projects", f"*{PROJECT_EXTENSION} *{BINARY_PROJECT_EXTENSION}"), ("Layout JSON", "*.json")],
+            title="Open Project"
+        )
+        if not file_path:
+            return
+        try:
+            job = load_project(file_path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Open Project", f"Failed to open project:\n{str(e)}")
+            return
+        self.apply_project(job)
+
+    def apply_project(self, job):
+        """Replace the layout with a loaded project.
+
+        State is set directly and the widgets that show it are refreshed
+        once, instead of replaying the edit callbacks head by head.
+        """
+        self.cancel_scheduled_preview()
+        numbering = job.to_dict()['numbering']
+        for var, key in ((self.start_num_var, 'start'), (self.step_var, 'step'), (self.total_pages_var, 'total'),
+                         (self.copies_var, 'copies'), (self.skip_var, 'skip')):
+            var.set(str(numbering[key]))
+        self.collate_var.set(job.collate)
+        self.order_var.set(job.order)
+
+        paper = job.paper
+        self.paper_var.set(paper['size'])
+        self.paper_width_var.set(paper.get('custom_width', self.paper_width_var.get()))
+        self.paper_height_var.set(paper.get('custom_height', self.paper_height_var.get()))
+        self.paper_unit_var.set(paper.get('custom_unit', self.paper_unit_var.get()))
+        self.paper_orientation = paper['orientation']
+        self.paper_rotation = paper['rotation']
+        self.highlight_paper_buttons()
+        self.bg_color_var.set(paper['bg_color'])
+        self.update_bg_color()
+
+        self.remove_background()
+        if paper['background_image']:
+            try:
+                self.load_background(paper['background_image'])
+            except Exception as e:
+                messagebox.showwarning("Open Project", f"Background image could not be loaded:\n{str(e)}")
+
+        self.numbering_heads = job.heads
+        self.selected_head_id = 0 if job.heads else None
+        self.current_page = 1
+        self.update_heads_list()
+        self.update_properties_panel(job.heads[0] if job.heads else None)
+        self.update_paper_size()
 
     def reset_all(self):
         if messagebox.askyesno("Reset", "Are you sure you want to reset all settings?"):
@@ -1843,6 +2031,7 @@ class NumberingSystemApp:
             self.step_var.set("1")
             self.total_pages_var.set("10")
             self.copies_var.set("1")
+            self.collate_var.set(True)
             self.skip_var.set("0")
             self.order_var.set("Ascending")
             self.add_numbering_head()
@@ -1861,6 +2050,44 @@ class NumberingSystemApp:
     def run(self):
         self.root.mainloop()
 
+def measure_startup():
+    """Time module loading, window construction and the first paint, then exit.
+
+    Prints one JSON object; deferred_modules lists the heavy libraries
+    that were still not loaded when the window first painted.
+    """
+    imported = time.perf_counter()
+    app = NumberingSystemApp()
+    constructed = time.perf_counter()
+    app.root.update_idletasks()
+    app.root.update()
+    painted = time.perf_counter()
+    # initial_fit has already started the warm-up, so check what was loaded before it
+    loaded = app.modules_before_warm_up if app.modules_before_warm_up is not None else set(sys.modules)
+    deferred = [name for name in DEFERRED_MODULES if name not in loaded]
+    if app.warm_up_thread is not None:
+        app.warm_up_thread.join()
+    warmed = time.perf_counter()
+    app.root.destroy()
+    print(json.dumps({
+        'imports_s': imported - IMPORT_STARTED,
+        'window_s': constructed - imported,
+        'first_paint_s': painted - IMPORT_STARTED,
+        'warm_up_s': warmed - painted,
+        'deferred_modules': deferred
+    }))
+    return 0
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Numbering System")
+    parser.add_argument("--startup-time", action="store_true", help="measure start-up time, print it as JSON and exit")
+    return parser
+
+
 if __name__ == "__main__":
+    args = build_arg_parser().parse_args()
+    if args.startup_time:
+        sys.exit(measure_startup())
     app = NumberingSystemApp()
     app.run()
\ No newline at end of file
@@ -0,0 +1,343 @@
+"""QR code and barcode image export for a NumberingJob.
+
+Images are encoded to PNG in a process pool and written by a single
+writer thread, which reports progress through a queue.Queue that the GUI
+polls with after(), like the print worker. The writer puts them in
+QR_Codes/ and Barcodes/ folders, straight into one ZIP or TAR archive
+with an index manifest, or packs them onto large sheet images (PNG files
+or one multi-page TIFF) with a coordinate map.
+"""
+import csv
+import io
+import os
+import queue
+import tarfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+from PIL import Image, TiffImagePlugin
+
+from numbering_engine import NumberingJob, resolve_workers, run_ordered_pool, record_symbol_failure, merge_symbol_failures, report_symbol_failures
+from profiling import span
+from symbology import make_qr_image, render_barcode_label
+
+# Pages encoded per pool task
+EXPORT_CHUNK = 64
+
+# Jobs with at least this many pages are encoded in a process pool
+PARALLEL_MIN_EXPORT_PAGES = 200
+
+QR_DIR = "QR_Codes"
+BARCODE_DIR = "Barcodes"
+
+# Archive member mapping page, head and value to the image member names
+MANIFEST_NAME = "index.csv"
+MANIFEST_FIELDS = ["page", "head", "value", "member"]
+
+# Characters replaced in image file names; prefixes and suffixes may contain any of them
+UNSAFE_FILE_CHARS = set('<>:"/\\|?*')
+
+ARCHIVE_FORMATS = ("zip", "tar")
+SHEET_FORMATS = ("sheets", "tiff")
+
+# Size of a label sheet and the white gap between packed codes, in pixels
+SHEET_SIZE = (4096, 4096)
+SHEET_GAP = 10
+
+# Coordinate map columns written next to the sheets
+SHEET_MAP_NAME = "sheets.csv"
+SHEET_MAP_FIELDS = ["page", "head", "value", "kind", "sheet", "x", "y", "width", "height"]
+
+
+def safe_file_name(text):
+    """text with path separators and characters Windows forbids in file names replaced"""
+    return "".join("_" if char in UNSAFE_FILE_CHARS or ord(char) < 32 else char for char in text)
+
+
+def encode_png(image, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", **options)
+    return buffer.getvalue()
+
+
+def export_chunk(job, first, last, encode, failures):
+    """Images for pages first..last as (folder, file name, data, page, head name, value) tuples.
+
+    data is the PNG file, or the bitmap itself when encode is False.
+    Values that cannot be encoded are skipped and counted in failures.
+    """
+    files = []
+    for page, page_texts in job.iter_pages(first, last):
+        for head, full_text in page_texts:
+            if full_text.strip() == '':
+                continue
+            filename = safe_file_name(f"{head['name']}_page{page}_{full_text}.png")
+
+            if head['show_qr']:
+                try:
+                    image = make_qr_image(full_text)
+                    files.append((QR_DIR, filename, encode_png(image) if encode else image, page, head['name'], full_text))
+                except Exception:
+                    record_symbol_failure(failures, head, 'QR', full_text)
+
+            if head['show_barcode']:
+                try:
+                    image = render_barcode_label(full_text, head)
+                    files.append((BARCODE_DIR, filename, encode_png(image, compress_level=1) if encode else image, page, head['name'], full_text))
+                except Exception:
+                    record_symbol_failure(failures, head, 'Barcode', full_text)
+    return files
+
+
+def _setup_export_worker(job_data, encode):
+    return {'job': NumberingJob.from_dict(job_data), 'encode': encode}
+
+
+def _export_chunk(state, first, last):
+    """Worker side: encoded images for pages first..last"""
+    failures = {}
+    files = export_chunk(state['job'], first, last, state['encode'], failures)
+    return last, files, failures
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class DirectoryWriter:
+    """One PNG file per image under QR_Codes/ and Barcodes/"""
+
+    def __init__(self, export_dir):
+        self.export_dir = Path(export_dir)
+        (self.export_dir / QR_DIR).mkdir(exist_ok=True)
+        (self.export_dir / BARCODE_DIR).mkdir(exist_ok=True)
+
+    def write(self, folder, filename, data, page, head_name, value):
+        with open(self.export_dir / folder / filename, "wb") as f:
+            f.write(data)
+
+    def close(self):
+        pass
+
+
+class ArchiveWriter:
+    """Stream every image into one ZIP or TAR file, then add the manifest.
+
+    Members are written sequentially as they arrive and PNGs are stored
+    without recompression. Only the manifest rows are kept in memory.
+    """
+
+    def __init__(self, path, archive_format):
+        self.archive_format = archive_format
+        if archive_format == "zip":
+            self.archive = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED, allowZip64=True)
+        elif archive_format == "tar":
+            self.archive = tarfile.open(path, "w", format=tarfile.PAX_FORMAT)
+        else:
+            raise ValueError(f"Unknown archive format: {archive_format}")
+        self.manifest = io.StringIO()
+        self.index = csv.writer(self.manifest)
+        self.index.writerow(MANIFEST_FIELDS)
+        self.mtime = time.time()
+
+    def write(self, folder, filename, data, page, head_name, value):
+        member = f"{folder}/{filename}"
+        self.add_member(member, data)
+        self.index.writerow([page, head_name, value, member])
+
+    def add_member(self, name, data):
+        if self.archive_format == "zip":
+            info = zipfile.ZipInfo(name, time.localtime(self.mtime)[:6])
+            self.archive.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = self.mtime
+            self.archive.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        try:
+            self.add_member(MANIFEST_NAME, self.manifest.getvalue().encode("utf-8"))
+        finally:
+            self.archive.close()
+
+
+class SheetWriter:
+    """Pack QR codes and barcodes onto large bilevel sheets.
+
+    Codes are placed left to right in rows, a new row starting when the
+    sheet is full across and a new sheet when it is full down; QR codes
+    and barcodes go on separate sheets. Sheets are saved as PNG files in
+    a folder, or as the frames of one Group 4 compressed TIFF. Every code
+    gets a row in the coordinate map CSV.
+    """
+
+    def __init__(self, target, tiff=False, sheet_size=SHEET_SIZE):
+        self.tiff = tiff
+        self.sheet_size = sheet_size
+        if tiff:
+            self.export_dir = Path(target).parent
+            map_path = os.path.splitext(target)[0] + ".csv"
+            self.tiff_file = TiffImagePlugin.AppendingTiffWriter(target, True)
+        else:
+            self.export_dir = Path(target)
+            map_path = self.export_dir / SHEET_MAP_NAME
+        self.paths = (target, map_path)
+        self.frame_count = 0
+        self.sheet_counts = {}
+        self.sheets = {}
+        self.map_file = open(map_path, "w", newline="", encoding="utf-8")
+        self.coordinates = csv.writer(self.map_file)
+        self.coordinates.writerow(SHEET_MAP_FIELDS)
+
+    def write(self, folder, filename, image, page, head_name, value):
+        width, height = image.size
+        sheet = self.sheets.get(folder)
+        if sheet is not None and sheet['x'] + width > sheet['image'].width:
+            # Start a new row
+            sheet['x'] = 0
+            sheet['y'] += sheet['row_height'] + SHEET_GAP
+            sheet['row_height'] = 0
+        if sheet is not None and (sheet['y'] + height > sheet['image'].height or width > sheet['image'].width):
+            self.save_sheet(folder)
+            sheet = None
+        if sheet is None:
+            sheet = self.new_sheet(folder, width, height)
+        x, y = sheet['x'], sheet['y']
+        sheet['image'].paste(image.convert('1'), (x, y))
+        sheet['x'] += width + SHEET_GAP
+        sheet['row_height'] = max(sheet['row_height'], height)
+        sheet['rows'].append([page, head_name, value, folder, x, y, width, height])
+
+    def new_sheet(self, folder, width, height):
+        """Empty sheet, enlarged when a single code does not fit the default size"""
+        size = (max(self.sheet_size[0], width), max(self.sheet_size[1], height))
+        sheet = {'image': Image.new('1', size, 1), 'rows': [], 'x': 0, 'y': 0, 'row_height': 0}
+        self.sheets[folder] = sheet
+        return sheet
+
+    def save_sheet(self, folder):
+        """Write a full sheet; its map rows name the PNG file or the TIFF frame number"""
+        sheet = self.sheets.pop(folder)
+        self.sheet_counts[folder] = self.sheet_counts.get(folder, 0) + 1
+        if self.tiff:
+            sheet['image'].save(self.tiff_file, format="TIFF", compression="group4")
+            self.tiff_file.newFrame()
+            self.frame_count += 1
+            name = self.frame_count
+        else:
+            name = f"{folder}_sheet{self.sheet_counts[folder]:04d}.png"
+            sheet['image'].save(self.export_dir / name, optimize=True)
+        for page, head_name, value, kind, x, y, width, height in sheet['rows']:
+            self.coordinates.writerow([page, head_name, value, kind, name, x, y, width, height])
+
+    def close(self):
+        try:
+            for folder in list(self.sheets):
+                self.save_sheet(folder)
+        finally:
+            self.map_file.close()
+            if self.tiff:
+                self.tiff_file.close()
+                if self.frame_count == 0:
+                    # A TIFF without frames is not a valid image; leave nothing behind
+                    for path in self.paths:
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+
+
+def open_image_writer(target, output_format=None):
+    if output_format in ARCHIVE_FORMATS:
+        return ArchiveWriter(target, output_format)
+    if output_format in SHEET_FORMATS:
+        return SheetWriter(target, tiff=output_format == "tiff")
+    return DirectoryWriter(target)
+
+
+class ImageExportWorker:
+    """Export a job's QR codes and barcodes on a background thread.
+
+    Messages put on self.messages:
+        ('progress', pages_done, total_pages)
+        ('done', qr_count, barcode_count)
+        ('cancelled', qr_count, barcode_count)
+        ('error', error message)
+
+    output_format is None for one file per code, 'zip' or 'tar' for an
+    archive, 'sheets' for PNG label sheets or 'tiff' for a multi-page
+    TIFF; target is the export folder or the archive/TIFF path.
+    """
+
+    def __init__(self, job, target, workers=None, output_format=None):
+        self.job = job
+        self.target = target
+        self.output_format = output_format
+        # Sheet writers pack the bitmaps themselves
+        self.encode = output_format not in SHEET_FORMATS
+        self.workers = resolve_workers(workers, job.total, PARALLEL_MIN_EXPORT_PAGES)
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.counts = {QR_DIR: 0, BARCODE_DIR: 0}
+        # (head name, kind) -> [count, first value] of values that could not be encoded
+        self.failures = {}
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            self.writer = open_image_writer(self.target, self.output_format)
+            try:
+                if self.workers > 1:
+                    self.export_parallel()
+                else:
+                    for first in range(1, self.job.total + 1, EXPORT_CHUNK):
+                        last = min(first + EXPORT_CHUNK - 1, self.job.total)
+                        with span("images.encode"):
+                            files = export_chunk(self.job, first, last, self.encode, self.failures)
+                        self.write_chunk(last, files)
+            finally:
+                with span("images.close"):
+                    self.writer.close()
+                report_symbol_failures(self.failures)
+        except ExportCancelled:
+            self.messages.put(('cancelled', self.counts[QR_DIR], self.counts[BARCODE_DIR]))
+            return
+        except Exception as e:
+            self.messages.put(('error', str(e)))
+            return
+        self.messages.put(('done', self.counts[QR_DIR], self.counts[BARCODE_DIR]))
+
+    def export_parallel(self):
+        """Encode chunks in worker processes and write them as they arrive in order"""
+        total = self.job.total
+        ranges = ((first, min(first + EXPORT_CHUNK - 1, total)) for first in range(1, total + 1, EXPORT_CHUNK))
+        run_ordered_pool(_export_chunk, ranges, self.workers, _setup_export_worker, (self.job.to_dict(), self.encode),
+                         self.write_parallel_chunk, "images.worker_wait")
+
+    def write_parallel_chunk(self, result):
+        last, files, failures = result
+        merge_symbol_failures(self.failures, failures)
+        self.write_chunk(last, files)
+
+    def write_chunk(self, last, files):
+        if self.cancel_event.is_set():
+            raise ExportCancelled()
+        with span("images.write"):
+            for image in files:
+                try:
+                    self.writer.write(*image)
+                except OSError as e:
+                    # One unwritable file should not end the whole export
+                    print(f"Image export error: {e}")
+                    continue
+                self.counts[image[0]] += 1
+        self.messages.put(('progress', last, self.job.total))
@@ -0,0 +1,675 @@
+"""Headless numbering engine shared by the GUI and the command line.
+
+A job is described by a plain layout dict (heads, paper, numbering) so it can
+be built from the Tk variables of NumberingSystemApp or loaded from a JSON
+file and rendered on a batch server without a display.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import zlib
+from array import array
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+
+from PIL import Image
+
+from pdf_writer import StreamingPdfWriter, pdf_number, pdf_string, rgb_operator
+from profiling import profiler, span
+from symbology import qr_vector_ops, barcode_vector_ops
+
+# Paper sizes in mm
+PAPER_SIZES = {
+    'A4': {'width': 210, 'height': 297},
+    'A3': {'width': 297, 'height': 420},
+    'Letter': {'width': 216, 'height': 279},
+    'Legal': {'width': 216, 'height': 356}
+}
+
+# PDF points per inch and per millimetre, computed as reportlab.lib.units does
+PDF_INCH = 72.0
+PDF_MM = PDF_INCH / 2.54 * 0.1
+
+PDF_PAGE_SIZES = {
+    'A4': (210 * PDF_MM, 297 * PDF_MM),
+    'A3': (297 * PDF_MM, 420 * PDF_MM),
+    'Letter': (8.5 * PDF_INCH, 11 * PDF_INCH),
+    'Legal': (8.5 * PDF_INCH, 14 * PDF_INCH)
+}
+
+PDF_FONT_MAP = {
+    'Arial': 'Helvetica',
+    'Arial Black': 'Helvetica-Bold',
+    'Arial Narrow': 'Helvetica',
+    'Calibri': 'Helvetica',
+    'Cambria': 'Times-Roman',
+    'Comic Sans MS': 'Helvetica',
+    'Consolas': 'Courier',
+    'Courier New': 'Courier',
+    'Georgia': 'Times-Roman',
+    'Impact': 'Helvetica-Bold',
+    'Times New Roman': 'Times-Roman',
+    'Trebuchet MS': 'Helvetica',
+    'Verdana': 'Helvetica',
+    'Helvetica': 'Helvetica',
+    'Garamond': 'Times-Roman',
+    'Bookman': 'Times-Roman',
+    'Avant Garde': 'Helvetica',
+    'Futura': 'Helvetica',
+    'Optima': 'Helvetica',
+    'Baskerville': 'Times-Roman',
+    'Didot': 'Times-Roman',
+}
+
+# Font size of the value printed under a barcode, as in the preview
+BARCODE_VALUE_SIZE = 10
+
+# Pages per number vector when streaming a job, to keep memory flat
+SEQUENCE_CHUNK = 4096
+
+# Jobs at least this long render in a process pool when workers is automatic
+PARALLEL_MIN_PAGES = 20000
+
+DEFAULT_NUMBERING = {
+    'start': 1,
+    'step': 1,
+    'total': 10,
+    'copies': 1,
+    'collate': True,
+    'skip': 0,
+    'order': 'Ascending'
+}
+
+
+def parse_int(value, default):
+    """Parse an entry value as int, using default for blank input"""
+    if value is None:
+        return default
+    value = str(value).strip()
+    return int(value) if value != "" else default
+
+
+def new_head(head_id):
+    return {
+        'id': head_id,
+        'name': f'Head {head_id + 1}',
+        'font': 'Arial',
+        'size': 16,
+        'rotation': 0,
+        'x': 100,
+        'y': 100,
+        'prefix': '',
+        'seed': '',
+        'add_space_after_prefix': False,
+        'zero_pad': 0,
+        'suffix': '',
+        'show_qr': False,
+        'qr_size': 50,
+        'qr_space': 10,
+        'show_barcode': False,
+        'barcode_type': 'CODE128',
+        'barcode_height': 50,
+        'barcode_width': 2,
+        'barcode_display_value': True,
+        'barcode_text_space': 5,  # FIXED: Space between barcode and text
+        'barcode_space': 10,
+        'bold': False,
+        'italic': False,
+        'underline': False,
+        'selected': True
+    }
+
+
+def get_pdf_font(head):
+    base_font = PDF_FONT_MAP.get(head['font'], 'Helvetica')
+    if head['bold'] and head['italic']:
+        if base_font == 'Helvetica':
+            return 'Helvetica-BoldOblique'
+        elif base_font == 'Times-Roman':
+            return 'Times-BoldItalic'
+        elif base_font == 'Courier':
+            return 'Courier-BoldOblique'
+    elif head['bold']:
+        if base_font == 'Helvetica':
+            return 'Helvetica-Bold'
+        elif base_font == 'Times-Roman':
+            return 'Times-Bold'
+        elif base_font == 'Courier':
+            return 'Courier-Bold'
+    elif head['italic']:
+        if base_font == 'Helvetica':
+            return 'Helvetica-Oblique'
+        elif base_font == 'Times-Roman':
+            return 'Times-Italic'
+        elif base_font == 'Courier':
+            return 'Courier-Oblique'
+    return base_font
+
+
+def number_for_page(page, start=1, step=1, skip=0, total=10, order='Ascending'):
+    if order == 'Ascending':
+        number = start + (page - 1) * step
+    else:
+        number = start + (total - page) * step
+
+    if skip > 0 and number >= skip:
+        number += math.floor((number - skip) / skip) + 1
+
+    return number
+
+
+_numpy = False
+
+
+def load_numpy():
+    """numpy, imported on first use, or None when it is not installed"""
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+
+_string_width = None
+
+
+def load_string_width():
+    """reportlab's stringWidth, imported once on first use"""
+    global _string_width
+    if _string_width is None:
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+        _string_width = stringWidth
+    return _string_width
+
+
+def number_sequence(total, start=1, step=1, skip=0, order='Ascending', first=1, last=None):
+    """Numbers for pages first..last computed as one vector.
+
+    Returns a NumPy int64 array, or an array('q') when NumPy is not installed.
+    Matches number_for_page for every page, including the skip adjustment.
+    """
+    np = load_numpy()
+    last = total if last is None else last
+    if last < first:
+        return np.zeros(0, dtype=np.int64) if np is not None else array('q')
+
+    if np is not None:
+        pages = np.arange(first, last + 1, dtype=np.int64)
+        if order == 'Ascending':
+            numbers = start + (pages - 1) * step
+        else:
+            numbers = start + (total - pages) * step
+        if skip > 0:
+            skipped = numbers >= skip
+            numbers[skipped] += (numbers[skipped] - skip) // skip + 1
+        return numbers
+
+    return array('q', (number_for_page(page, start, step, skip, total, order) for page in range(first, last + 1)))
+
+
+def head_seed(head):
+    seed_str = head['seed']
+    return int(seed_str) if seed_str and str(seed_str).strip() != '' else 0
+
+
+def head_label(head):
+    """Fixed text printed before the number: the prefix and its spacer"""
+    if head['add_space_after_prefix'] and head['prefix']:
+        return head['prefix'] + " "
+    return head['prefix']
+
+
+def format_head_text(head, page_num):
+    """Build the printed text of a head for the page number"""
+    return format_head_number(head, page_num + head_seed(head))
+
+
+def format_head_number(head, final_num):
+    """Printed text of a head for its final number (page number plus seed)"""
+    formatted = str(final_num).zfill(head['zero_pad']) if head['zero_pad'] > 0 else str(final_num)
+    return head_label(head) + formatted + head['suffix']
+
+
+class NumberingJob:
+    """A numbering layout plus its numbering settings, independent of Tk"""
+
+    def __init__(self, heads, numbering=None, paper=None):
+        self.heads = heads
+        numbering = dict(DEFAULT_NUMBERING, **(numbering or {}))
+        self.start = int(numbering['start'])
+        self.step = int(numbering['step'])
+        self.total = int(numbering['total'])
+        self.copies = int(numbering['copies'])
+        self.collate = bool(numbering['collate'])
+        self.skip = int(numbering['skip'])
+        self.order = numbering['order']
+        self.paper = dict({'size': 'A4', 'orientation': 'portrait', 'rotation': 0, 'bg_color': '#ffffff', 'background_image': None}, **(paper or {}))
+
+    @classmethod
+    def from_dict(cls, data):
+        heads = []
+        for i, head_data in enumerate(data.get('heads', [])):
+            head = new_head(i)
+            head.update(head_data)
+            heads.append(head)
+        return cls(heads, data.get('numbering'), data.get('paper'))
+
+    def to_dict(self):
+        return {
+            'paper': dict(self.paper),
+            'numbering': {
+                'start': self.start,
+                'step': self.step,
+                'total': self.total,
+                'copies': self.copies,
+                'collate': self.collate,
+                'skip': self.skip,
+                'order': self.order
+            },
+            'heads': [dict(head) for head in self.heads]
+        }
+
+    def number_for_page(self, page):
+        return number_for_page(page, self.start, self.step, self.skip, self.total, self.order)
+
+    def number_sequence(self, first=1, last=None):
+        return number_sequence(self.total, self.start, self.step, self.skip, self.order, first, last)
+
+    def head_numbers(self, first=1, last=None):
+        """Per selected head, the vector of final numbers (page number + seed)"""
+        numbers = self.number_sequence(first, last)
+        if load_numpy() is not None:
+            return [numbers + head_seed(head) for head in self.selected_heads()]
+        return [array('q', (n + head_seed(head) for n in numbers)) for head in self.selected_heads()]
+
+    def iter_pages(self, first=1, last=None):
+        """Yield (page, [(head, text), ...]) from the per-head number vectors"""
+        heads = self.selected_heads()
+        numbers = [vector.tolist() for vector in self.head_numbers(first, last)]
+        for page, head_nums in enumerate(zip(*numbers), first):
+            yield page, [(head, format_head_number(head, final_num)) for head, final_num in zip(heads, head_nums)]
+
+    def selected_heads(self):
+        return [h for h in self.heads if h['selected']]
+
+    def get_pagesize(self):
+        return PDF_PAGE_SIZES.get(self.paper['size'], PDF_PAGE_SIZES['A4'])
+
+    def page_setup(self, writer):
+        """Precompute the operators every page shares for the streaming writer.
+
+        The static layer (fill colour, background image and the fixed
+        prefix label of each head) is written once as a Form XObject.
+        Returns the operator drawing it and one entry per selected head
+        with its parsed seed, text operator prefix, the length of its fixed
+        label and the placement of its QR code and barcode; only the
+        numbers differ from page to page.
+        """
+        from reportlab.lib.colors import HexColor
+        string_width = load_string_width()
+
+        width, height = self.get_pagesize()
+        static = [
+            f"{rgb_operator(HexColor(self.paper['bg_color']))}\n"
+            f"0 0 {pdf_number(width)} {pdf_number(height)} re f\n"
+        ]
+        if self.paper.get('background_image'):
+            # Stretched over the page like the preview; stored once, drawn by name
+            image = embed_image(writer, self.paper['background_image'])
+            static.append(f"q {pdf_number(width)} 0 0 {pdf_number(height)} 0 0 cm /{image} Do Q\n")
+        static.append("0 g\n")
+        head_ops = []
+        for head in self.selected_heads():
+            pdf_font = get_pdf_font(head)
+            font = writer.font(pdf_font)
+            label = head_label(head)
+            x = head['x']
+            if label:
+                static.append(f"BT /{font} {pdf_number(head['size'])} Tf 1 0 0 1 {pdf_number(x)} {pdf_number(height - head['y'])} Tm ")
+                static.append(pdf_string(label).decode('latin-1') + " Tj ET\n")
+                x += string_width(label, pdf_font, head['size'])
+            text_op = (
+                f"BT /{font} {pdf_number(head['size'])} Tf "
+                f"1 0 0 1 {pdf_number(x)} {pdf_number(height - head['y'])} Tm "
+            ).encode('latin-1')
+            # Symbols sit centred below the number text, as in the preview
+            text_center_y = head['y'] - head['size'] * 0.35
+            qr = None
+            if head['show_qr']:
+                qr_size = max(head['qr_size'], 10)
+                center_y = text_center_y + head['size'] + head['qr_space']
+                qr = (qr_size, height - center_y - qr_size / 2)
+            bc = None
+            if head['show_barcode']:
+                bar_height = max(head['barcode_height'], 10)
+                center_y = text_center_y + head['size'] + head['barcode_space']
+                value_font = writer.font('Helvetica') if head['barcode_display_value'] else None
+                value_y = height - (center_y + bar_height + head['barcode_text_space']) - BARCODE_VALUE_SIZE * 0.35
+                bc = (head['barcode_type'], head['barcode_width'], bar_height, height - center_y - bar_height / 2, value_font, value_y)
+            head_ops.append((head, head_seed(head), text_op, len(label), pdf_font, qr, bc))
+        template = writer.form("".join(static).encode('latin-1'))
+        return f"/{template} Do\n".encode('latin-1'), head_ops
+
+    def render_pdf(self, target, progress=None, workers=1, first=1, last=None):
+        """Stream pages first..last (default: all) to target (a path or a binary file object).
+
+        Each page is written as soon as it is built, so memory use does not
+        grow with the page count. With workers > 1 (0 = one per CPU, None =
+        automatic for large jobs) page content is built in a process pool.
+        Every page is rendered once; further copies, collated (whole sets)
+        or not (each page repeated), reuse its content stream. progress
+        counts rendered pages, not copies.
+        """
+        last = self.total if last is None else min(last, self.total)
+        workers = resolve_workers(workers, last - first + 1)
+        failures = {}
+        with StreamingPdfWriter(target, self.get_pagesize()) as writer:
+            with span("pdf.setup"):
+                template, head_ops = self.page_setup(writer)
+            copies = max(self.copies, 1)
+            # Content stream ids of the first set, repeated after it when collating
+            content_ids = array('Q') if copies > 1 and self.collate else None
+            if workers > 1:
+                self._render_parallel(writer, template, head_ops, workers, progress, content_ids, first, last, failures)
+            else:
+                for chunk_first in range(first, last + 1, SEQUENCE_CHUNK):
+                    chunk_last = min(chunk_first + SEQUENCE_CHUNK - 1, last)
+                    with span("pdf.pages"):
+                        for page, page_num in enumerate(self.number_sequence(chunk_first, chunk_last).tolist(), chunk_first):
+                            self._add_page(writer, page_content(page_num, template, head_ops, failures), False, content_ids)
+                            if progress:
+                                progress(page, self.total)
+            if content_ids is not None:
+                with span("pdf.copies"):
+                    for _ in range(copies - 1):
+                        for content_id in content_ids:
+                            writer.add_page_object(content_id)
+        report_symbol_failures(failures)
+
+    def _add_page(self, writer, content, compressed, content_ids):
+        """Write one rendered page, followed by its copies when not collating"""
+        content_id = writer.add_stream(content, compressed=compressed)
+        writer.add_page_object(content_id)
+        if content_ids is not None:
+            content_ids.append(content_id)
+        else:
+            for _ in range(self.copies - 1):
+                writer.add_page_object(content_id)
+
+    def _render_parallel(self, writer, template, head_ops, workers, progress, content_ids, first, last, failures):
+        """Build page chunks in worker processes and append them in page order"""
+        chunk = max(256, min(SEQUENCE_CHUNK, (last - first + 1) // (workers * 4)))
+        ranges = ((start, min(start + chunk - 1, last)) for start in range(first, last + 1, chunk))
+
+        def write(result):
+            start, streams, chunk_failures = result
+            merge_symbol_failures(failures, chunk_failures)
+            with span("pdf.write"):
+                for stream in streams:
+                    self._add_page(writer, stream, writer.compress, content_ids)
+            if progress:
+                progress(start + len(streams) - 1, self.total)
+
+        initargs = (self.to_dict(), template, head_ops, writer.compress)
+        run_ordered_pool(_render_chunk, ranges, workers, _setup_render_worker, initargs, write, "pdf.worker_wait")
+
+
+def resolve_workers(workers, total, min_pages=PARALLEL_MIN_PAGES):
+    """Number of render processes for a job of total pages"""
+    if workers is None:
+        return (os.cpu_count() or 1) if total >= min_pages else 1
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def run_ordered_pool(function, ranges, workers, setup, setup_args, handle, wait_span="pool.wait"):
+    """Run function(state, first, last) for every (first, last) range in a process pool.
+
+    Each worker process builds its state once with setup(*setup_args).
+    Results are passed to handle in range order as they complete, with a
+    bounded number of chunks in flight so memory stays flat. When handle
+    raises (a cancel, a write error) the queued chunks are dropped.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # The GUI starts pools from a worker thread; forking a threaded process can deadlock
+    # the child, so POSIX workers come from a fork server instead
+    context = multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else None)
+    pool = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_pool_worker, initargs=(setup, setup_args))
+    try:
+        pending = deque(pool.submit(_run_pool_chunk, function, first, last) for first, last in islice(ranges, workers * 2))
+        while pending:
+            with span(wait_span):
+                result = pending.popleft().result()
+            handle(result)
+            next_range = next(ranges, None)
+            if next_range:
+                pending.append(pool.submit(_run_pool_chunk, function, *next_range))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+# State of this pool worker process, built once by its initializer
+_pool_worker = {}
+
+
+def _init_pool_worker(setup, setup_args):
+    _pool_worker.update(setup(*setup_args))
+
+
+def _run_pool_chunk(function, first, last):
+    return function(_pool_worker, first, last)
+
+
+def _setup_render_worker(job_data, template, head_ops, compress):
+    return {
+        'job': NumberingJob.from_dict(job_data),
+        'template': template,
+        'head_ops': head_ops,
+        'compress': zlib.compress if compress else bytes
+    }
+
+
+def _render_chunk(state, first, last):
+    """Worker side: content streams for pages first..last"""
+    template = state['template']
+    head_ops = state['head_ops']
+    compress = state['compress']
+    failures = {}
+    streams = [compress(page_content(page_num, template, head_ops, failures)) for page_num in state['job'].number_sequence(first, last).tolist()]
+    return first, streams, failures
+
+
+def page_content(page_num, template, head_ops, failures):
+    """Content stream of one page: the static template plus the numbers.
+
+    Symbols that cannot be encoded are left out and counted in failures.
+    """
+    parts = [template]
+    for head, seed, text_op, label_length, pdf_font, qr, bc in head_ops:
+        text = format_head_number(head, page_num + seed)
+        parts.append(text_op + pdf_string(text[label_length:]) + b" Tj ET\n")
+        if text.strip() == '' or not (qr or bc):
+            continue
+        center_x = head['x'] + load_string_width()(text, pdf_font, head['size']) / 2
+        if qr:
+            ops = qr_page_ops(text, center_x, *qr)
+            if not ops:
+                record_symbol_failure(failures, head, 'QR', text)
+            parts.append(ops)
+        if bc:
+            ops = barcode_page_ops(text, center_x, *bc)
+            if not ops:
+                record_symbol_failure(failures, head, 'Barcode', text)
+            parts.append(ops)
+    return b"".join(parts)
+
+
+def embed_image(writer, path):
+    """Register an image file with the writer; baseline JPEGs are copied as-is"""
+    with Image.open(path) as image:
+        if image.format == 'JPEG' and image.mode in ('RGB', 'L'):
+            with open(path, 'rb') as f:
+                data = f.read()
+            color_space = 'DeviceRGB' if image.mode == 'RGB' else 'DeviceGray'
+            return writer.image(path, image.width, image.height, data, color_space, filter='DCTDecode')
+        smask = None
+        if 'A' in image.getbands() or 'transparency' in image.info:
+            image = image.convert('RGBA')
+            smask = image.getchannel('A').tobytes()
+            image = image.convert('RGB')
+        elif image.mode != 'L':
+            image = image.convert('RGB')
+        color_space = 'DeviceRGB' if image.mode == 'RGB' else 'DeviceGray'
+        return writer.image(path, image.width, image.height, image.tobytes(), color_space, smask=smask)
+
+
+@lru_cache(maxsize=4096)
+def symbol_geometry(kind, text, barcode_type=None):
+    """Vector geometry of a QR code or barcode, built once per distinct value.
+
+    Returns None when the value cannot be encoded, e.g. letters in an
+    EAN13 head; callers count those with record_symbol_failure().
+    """
+    try:
+        if kind == 'qr':
+            return qr_vector_ops(text)
+        return barcode_vector_ops(text, barcode_type)
+    except Exception:
+        return None
+
+
+def record_symbol_failure(failures, head, kind, text):
+    """Count a value that could not be encoded; failures maps (head name, kind) to [count, first value]"""
+    failure = failures.get((head['name'], kind))
+    if failure is None:
+        failures[(head['name'], kind)] = [1, text]
+    else:
+        failure[0] += 1
+
+
+def merge_symbol_failures(failures, more):
+    for key, (count, text) in more.items():
+        failure = failures.get(key)
+        if failure is None:
+            failures[key] = [count, text]
+        else:
+            failure[0] += count
+
+
+def report_symbol_failures(failures):
+    """One line per head and symbology instead of one per failed value"""
+    for (name, kind), (count, text) in failures.items():
+        print(f"{kind} error: {count} value(s) of {name} could not be encoded (first: {text!r})", file=sys.stderr)
+
+
+def qr_page_ops(text, center_x, size, bottom):
+    geometry = symbol_geometry('qr', text)
+    if geometry is None:
+        return b""
+    ops, modules = geometry
+    scale = pdf_number(size / modules)
+    left = center_x - size / 2
+    return f"q {scale} 0 0 {scale} {pdf_number(left)} {pdf_number(bottom)} cm ".encode('latin-1') + ops + b" f Q\n"
+
+
+def barcode_page_ops(text, center_x, barcode_type, module_width, bar_height, bottom, value_font, value_y):
+    geometry = symbol_geometry('bc', text, barcode_type)
+    if geometry is None:
+        return b""
+    ops, modules = geometry
+    left = center_x - modules * module_width / 2
+    parts = [
+        f"q {pdf_number(module_width)} 0 0 {pdf_number(bar_height)} {pdf_number(left)} {pdf_number(bottom)} cm ".encode('latin-1')
+        + ops + b" f Q\n"
+    ]
+    if value_font:
+        value_x = center_x - load_string_width()(text, 'Helvetica', BARCODE_VALUE_SIZE) / 2
+        parts.append(
+            f"BT /{value_font} {BARCODE_VALUE_SIZE} Tf 1 0 0 1 {pdf_number(value_x)} {pdf_number(value_y)} Tm ".encode('latin-1')
+            + pdf_string(text) + b" Tj ET\n"
+        )
+    return b"".join(parts)
+
+
+def load_layout(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return NumberingJob.from_dict(json.load(f))
+
+
+def save_layout(job, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(job.to_dict(), f, indent=2)
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Render a numbering layout to PDF without the GUI.")
+    parser.add_argument("layout", help="layout JSON file (heads, paper, numbering)")
+    parser.add_argument("-o", "--output", required=True, help="output PDF path")
+    parser.add_argument("--start", type=int, help="override the start number")
+    parser.add_argument("--step", type=int, help="override the step")
+    parser.add_argument("--skip", type=int, help="override the skip value")
+    parser.add_argument("--total", type=int, help="override the total number of pages")
+    parser.add_argument("--order", choices=["Ascending", "Descending"], help="override the numbering order")
+    parser.add_argument("--copies", type=int, help="override the number of copies")
+    parser.add_argument("--collate", dest="collate", action="store_true", default=None, help="print copies as whole sets")
+    parser.add_argument("--no-collate", dest="collate", action="store_false", help="repeat each page for its copies")
+    parser.add_argument("--paper", choices=list(PDF_PAGE_SIZES.keys()), help="override the paper size")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="render processes (0 = one per CPU, default: automatic for large jobs)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not report progress")
+    parser.add_argument("--profile", metavar="TRACE", help="time the render stages and write a Chrome trace JSON file")
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    try:
+        job = load_layout(args.layout)
+    except (OSError, ValueError) as e:
+        print(f"Could not load layout: {e}", file=sys.stderr)
+        return 1
+
+    for name in ('start', 'step', 'skip', 'total', 'order', 'copies', 'collate'):
+        value = getattr(args, name)
+        if value is not None:
+            setattr(job, name, value)
+    if args.paper:
+        job.paper['size'] = args.paper
+
+    reported = [0]
+
+    def report(page, total):
+        # Parallel renders report once per chunk, so print whenever a 1000-page boundary is crossed
+        if page == total or page // 1000 > reported[0] // 1000:
+            print(f"\rRendered {page}/{total} pages", end="", file=sys.stderr)
+            if page == total:
+                print(file=sys.stderr)
+        reported[0] = page
+
+    profiler.enable(bool(args.profile))
+    try:
+        job.render_pdf(args.output, progress=None if args.quiet else report, workers=args.workers)
+    except OSError as e:
+        print(f"Could not render PDF: {e}", file=sys.stderr)
+        return 1
+    if args.profile:
+        for name, count, total, mean, _, high in profiler.summary():
+            print(f"{name:<20}{count:>8} spans {total:>10.1f} ms total {mean:>9.2f} ms mean {high:>9.2f} ms max", file=sys.stderr)
+        try:
+            profiler.dump_trace(args.profile)
+        except OSError as e:
+            print(f"Could not write trace: {e}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
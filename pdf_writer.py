@@ -0,0 +1,259 @@
+"""Minimal streaming PDF writer used by the numbering engine.
+
+reportlab keeps every page of a document in memory until save(), so large
+numbering jobs grow with the page count. This writer emits each object to
+the output file as soon as it is produced and only keeps the byte offsets
+needed for the cross-reference table.
+"""
+import os
+import zlib
+from array import array
+
+
+def pdf_number(value):
+    """Format a number the short way PDF operators expect"""
+    if isinstance(value, int):
+        return str(value)
+    text = f"{value:.4f}".rstrip('0').rstrip('.')
+    return text if text not in ('', '-0') else '0'
+
+
+def pdf_string(text):
+    """Encode text as a PDF literal string for the WinAnsi standard fonts"""
+    data = text.encode('cp1252', errors='replace')
+    data = data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+    return b'(' + data + b')'
+
+
+def rgb_operator(color, stroke=False):
+    """PDF colour operator for a reportlab Color"""
+    op = 'RG' if stroke else 'rg'
+    return f"{pdf_number(color.red)} {pdf_number(color.green)} {pdf_number(color.blue)} {op}"
+
+
+class StreamingPdfWriter:
+    """Write a PDF page by page straight to a file.
+
+    Objects 1 and 2 are reserved for the catalog and the root of the page
+    tree, object 3 for the resource dictionary shared by every page. Pages
+    are grouped under intermediate tree nodes of PAGE_TREE_FANOUT kids so
+    viewers do not have to load one huge Kids array. Reserved objects are
+    filled in by close().
+    """
+
+    CATALOG_ID = 1
+    PAGES_ID = 2
+    RESOURCES_ID = 3
+    PAGE_TREE_FANOUT = 64
+
+    def __init__(self, target, pagesize, compress=True):
+        if hasattr(target, 'write'):
+            self.file = target
+            self.owns_file = False
+            self.path = None
+        else:
+            self.file = open(target, 'wb')
+            self.owns_file = True
+            self.path = target
+        self.pagesize = pagesize
+        self.compress = compress
+        self.position = 0
+        # Byte offset per object number; index 0 is the free-list head
+        self.offsets = array('Q', [0, 0, 0, 0])
+        self.page_ids = array('Q')
+        self.leaf_ids = array('Q')
+        self.fonts = {}
+        self.font_ids = {}
+        self.images = {}
+        self.xobject_ids = {}
+        self.closed = False
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data):
+        self.file.write(data)
+        self.position += len(data)
+
+    def reserve(self):
+        """Reserve an object number to be written later"""
+        self.offsets.append(0)
+        return len(self.offsets) - 1
+
+    def write_object(self, obj_id, body):
+        if isinstance(body, str):
+            body = body.encode('latin-1')
+        self.offsets[obj_id] = self.position
+        self._write(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+
+    def add_object(self, body):
+        obj_id = self.reserve()
+        self.write_object(obj_id, body)
+        return obj_id
+
+    def add_stream(self, data, extra=b'', compressed=False):
+        """Write a stream object and return its id.
+
+        Data is Flate compressed when compression is enabled, unless the
+        caller already compressed it (compressed=True, e.g. in a worker).
+        """
+        if isinstance(data, str):
+            data = data.encode('latin-1')
+        if isinstance(extra, str):
+            extra = extra.encode('latin-1')
+        if compressed or self.compress:
+            if not compressed:
+                data = zlib.compress(data)
+            extra += b" /Filter /FlateDecode"
+        header = b"<< /Length %d" % len(data) + extra + b" >>\nstream\n"
+        return self.add_object(header + data + b"\nendstream")
+
+    def font(self, base_font):
+        """Resource name of a standard Type1 font, registering it on first use"""
+        name = self.fonts.get(base_font)
+        if name is None:
+            name = f"F{len(self.fonts) + 1}"
+            obj_id = self.add_object(f"<< /Type /Font /Subtype /Type1 /BaseFont /{base_font} /Encoding /WinAnsiEncoding >>")
+            self.fonts[base_font] = name
+            self.font_ids[name] = obj_id
+        return name
+
+    def image(self, key, width, height, data, color_space, filter=None, smask=None):
+        """Resource name of an image XObject, writing it on first use.
+
+        The image is stored once and every page draws it by name, however
+        many pages reference it. data is either already encoded with filter
+        (e.g. a JPEG file with DCTDecode) or raw samples written like any
+        other stream. smask is optional raw 8-bit alpha.
+        """
+        name = self.images.get(key)
+        if name is None:
+            extra = f" /Type /XObject /Subtype /Image /Width {width} /Height {height} /BitsPerComponent 8"
+            if smask is not None:
+                mask_id = self._add_image_stream(smask, extra + " /ColorSpace /DeviceGray", None)
+                extra += f" /SMask {mask_id} 0 R"
+            obj_id = self._add_image_stream(data, extra + f" /ColorSpace /{color_space}", filter)
+            name = f"Im{len(self.images) + 1}"
+            self.images[key] = name
+            self.xobject_ids[name] = obj_id
+        return name
+
+    def form(self, content):
+        """Resource name of a new page-sized Form XObject drawing content.
+
+        Pages draw it with a single Do operator, so operators shared by
+        every page are written once instead of in each content stream.
+        """
+        width, height = self.pagesize
+        obj_id = self.add_stream(
+            content,
+            f" /Type /XObject /Subtype /Form /BBox [0 0 {pdf_number(width)} {pdf_number(height)}] "
+            f"/Resources {self.RESOURCES_ID} 0 R"
+        )
+        name = f"Fm{len(self.xobject_ids) + 1}"
+        self.xobject_ids[name] = obj_id
+        return name
+
+    def _add_image_stream(self, data, extra, filter):
+        if filter is None:
+            return self.add_stream(data, extra)
+        return self.add_object(b"<< /Length %d" % len(data) + extra.encode('latin-1') + b" /Filter /%s >>\nstream\n" % filter.encode('latin-1') + data + b"\nendstream")
+
+    def add_page_object(self, content_id):
+        """Add a page drawing an already written content stream.
+
+        Copies of a page reuse its content this way, so each extra copy
+        costs one small page dictionary.
+        """
+        if len(self.page_ids) % self.PAGE_TREE_FANOUT == 0:
+            self.leaf_ids.append(self.reserve())
+        # Resources and MediaBox are inherited from the root of the page tree
+        page_id = self.add_object(b"<< /Type /Page /Parent %d 0 R /Contents %d 0 R >>" % (self.leaf_ids[-1], content_id))
+        self.page_ids.append(page_id)
+        return page_id
+
+    def _write_resources(self):
+        fonts = " ".join(f"/{name} {obj_id} 0 R" for name, obj_id in self.font_ids.items())
+        if not self.xobject_ids:
+            self.write_object(self.RESOURCES_ID, f"<< /ProcSet [/PDF /Text] /Font << {fonts} >> >>")
+            return
+        xobjects = " ".join(f"/{name} {obj_id} 0 R" for name, obj_id in self.xobject_ids.items())
+        self.write_object(self.RESOURCES_ID, f"<< /ProcSet [/PDF /Text /ImageB /ImageC] /Font << {fonts} >> /XObject << {xobjects} >> >>")
+
+    def _write_pages_node(self, node_id, parent_id, kids, count):
+        if parent_id:
+            parent = b"/Parent %d 0 R " % parent_id
+        else:
+            width, height = self.pagesize
+            parent = f"/Resources {self.RESOURCES_ID} 0 R /MediaBox [0 0 {pdf_number(width)} {pdf_number(height)}] ".encode('latin-1')
+        kid_refs = b"".join(b"%d 0 R " % kid for kid in kids)
+        self.write_object(node_id, b"<< /Type /Pages " + parent + b"/Count %d /Kids [" % count + kid_refs + b"] >>")
+
+    def _write_pages(self):
+        fanout = self.PAGE_TREE_FANOUT
+        # Each level is a list of (node id, page count); leaf kids are the pages
+        level = [(leaf_id, min(fanout, len(self.page_ids) - i * fanout)) for i, leaf_id in enumerate(self.leaf_ids)]
+        levels = []
+        while len(level) > fanout:
+            levels.append(level)
+            level = [(self.reserve(), sum(count for _, count in level[i:i + fanout])) for i in range(0, len(level), fanout)]
+        levels.append(level)
+
+        for depth, nodes in enumerate(levels):
+            parents = levels[depth + 1] if depth + 1 < len(levels) else None
+            for i, (node_id, count) in enumerate(nodes):
+                parent_id = parents[i // fanout][0] if parents else self.PAGES_ID
+                if depth == 0:
+                    kids = self.page_ids[i * fanout:(i + 1) * fanout]
+                else:
+                    kids = [kid_id for kid_id, _ in levels[depth - 1][i * fanout:(i + 1) * fanout]]
+                self._write_pages_node(node_id, parent_id, kids, count)
+
+        self._write_pages_node(self.PAGES_ID, None, [node_id for node_id, _ in level], len(self.page_ids))
+
+    def _write_xref(self):
+        xref_position = self.position
+        count = len(self.offsets)
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % count)
+        for start in range(1, count, 1024):
+            chunk = self.offsets[start:start + 1024]
+            self._write(b"".join(b"%010d 00000 n \n" % offset for offset in chunk))
+        self._write(
+            b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+            % (count, self.CATALOG_ID, xref_position)
+        )
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._write_resources()
+            self._write_pages()
+            self.write_object(self.CATALOG_ID, f"<< /Type /Catalog /Pages {self.PAGES_ID} 0 R >>")
+            self._write_xref()
+            self.file.flush()
+        except BaseException:
+            self.abort()
+            raise
+        if self.owns_file:
+            self.file.close()
+
+    def abort(self):
+        """Stop writing; a file this writer opened is removed rather than left without an xref"""
+        self.closed = True
+        if not self.owns_file:
+            return
+        self.file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+            return False
+        self.close()
+        return False
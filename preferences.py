@@ -0,0 +1,22 @@
+"""Per-user application preferences, kept as JSON in the home directory."""
+import json
+from pathlib import Path
+
+PREFERENCES_PATH = Path.home() / ".numbering_system.json"
+
+
+def load_preferences(path=PREFERENCES_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_preferences(preferences, path=PREFERENCES_PATH):
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(preferences, f, indent=2)
+    except OSError as e:
+        print(f"Preferences save error: {e}")
@@ -0,0 +1,428 @@
+"""Background print pipeline: render the job to a temp PDF and hand it to the OS.
+
+Large jobs can instead be spooled as a series of chunk PDFs, each sent as
+soon as it is rendered, and PDF export renders the same way to a chosen
+file. Everything here runs off the Tk main thread. The workers report back
+through a queue.Queue that the GUI polls with after(), so the window stays
+responsive while a job renders and spools.
+"""
+import os
+import platform
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+from numbering_engine import NumberingJob
+from profiling import span
+
+# Pages per PDF when a job is spooled in chunks
+SPOOL_CHUNK_PAGES = 500
+
+# Rendered pages between progress messages
+PROGRESS_PAGES = 100
+
+
+class PrintCancelled(Exception):
+    pass
+
+
+def run_command(args, timeout, cancel_event=None, capture=True):
+    """subprocess.run with a timeout that also stops when cancel_event is set"""
+    output = subprocess.PIPE if capture else None
+    process = subprocess.Popen(args, stdout=output, stderr=output, text=True)
+    waited = 0.0
+    while True:
+        try:
+            stdout, stderr = process.communicate(timeout=0.2)
+            return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+        except subprocess.TimeoutExpired:
+            waited += 0.2
+            if (cancel_event is not None and cancel_event.is_set()) or waited >= timeout:
+                process.kill()
+                process.communicate()
+                if waited >= timeout:
+                    raise subprocess.TimeoutExpired(args, timeout)
+                raise PrintCancelled()
+
+
+def discover_printers():
+    """Installed print queues and the system default queue (or None)"""
+    printers = []
+    default = None
+    if platform.system() == "Windows":
+        return printers, default
+    try:
+        result = run_command(["lpstat", "-p"], 10)
+        if result.returncode == 0:
+            printers = [line.split()[1] for line in result.stdout.split('\n') if line.startswith('printer')]
+        result = run_command(["lpstat", "-d"], 10)
+        # "system default destination: NAME" or "no system default destination"
+        if result.returncode == 0 and ':' in result.stdout:
+            default = result.stdout.split(':', 1)[1].strip() or None
+    except FileNotFoundError:
+        # No CUPS client tools on this system
+        pass
+    except Exception as e:
+        print(f"Printer discovery error: {e}")
+    return printers, default
+
+
+class PrinterRegistry:
+    """Printer list discovered on a background thread and cached between prints.
+
+    refresh() starts a discovery unless one is running; each finished
+    discovery puts ('printers', names, system default) on self.messages.
+    """
+
+    def __init__(self):
+        self.printers = []
+        self.system_default = None
+        self.updated = None
+        self.messages = queue.Queue()
+        self.thread = None
+
+    def refresh(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        printers, default = discover_printers()
+        self.printers = printers
+        self.system_default = default
+        self.updated = time.time()
+        self.messages.put(('printers', printers, default))
+
+
+def send_to_printer(path, cancel_event=None, printer=None):
+    """Platform-specific print of a PDF file. Returns (success, error message)
+
+    With a known printer queue the file goes straight to it; otherwise
+    every discovered printer is tried, then lpr and a PDF viewer.
+    """
+    sys_name = platform.system()
+    print_success = False
+    print_error_msg = ""
+
+    if printer and sys_name != "Windows":
+        command = ["lpr", "-P", printer, path] if sys_name == "Darwin" else ["lp", "-d", printer, path]
+        result = run_command(command, 30, cancel_event)
+        if result.returncode == 0:
+            return True, ""
+        return False, f"{command[0]} failed: {result.stderr}"
+
+    if sys_name == "Windows":
+        if os.path.exists(path):
+            os.startfile(path, "print")
+            print_success = True
+        else:
+            raise FileNotFoundError("PDF file not created")
+
+    elif sys_name == "Darwin":
+        result = run_command(["lpr", path], 30, cancel_event)
+        if result.returncode == 0:
+            print_success = True
+        else:
+            print_error_msg = f"lpr failed: {result.stderr}"
+
+    else:
+        try:
+            lpstat_result = run_command(["lpstat", "-p"], 10, cancel_event)
+            if lpstat_result.returncode == 0:
+                printers = [line.split()[1] for line in lpstat_result.stdout.split('\n') if line.startswith('printer')]
+            else:
+                printers = []
+        except PrintCancelled:
+            raise
+        except Exception:
+            printers = []
+
+        for printer in printers:
+            try:
+                result = run_command(["lp", "-d", printer, path], 30, cancel_event)
+                if result.returncode == 0:
+                    print_success = True
+                    break
+            except PrintCancelled:
+                raise
+            except Exception:
+                continue
+
+        if not print_success:
+            try:
+                result = run_command(["lpr", path], 30, cancel_event)
+                if result.returncode == 0:
+                    print_success = True
+                else:
+                    print_error_msg = f"lpr failed: {result.stderr}"
+            except PrintCancelled:
+                raise
+            except Exception as e:
+                print_error_msg = f"lpr failed: {str(e)}"
+
+        if not print_success:
+            try:
+                if os.path.exists('/usr/bin/xdg-open'):
+                    run_command(["xdg-open", path], 30, cancel_event, capture=False)
+                    print_success = True
+                elif os.path.exists('/usr/bin/evince'):
+                    run_command(["evince", "--print", path], 30, cancel_event, capture=False)
+                    print_success = True
+            except PrintCancelled:
+                raise
+            except Exception:
+                pass
+
+    return print_success, print_error_msg
+
+
+class RenderWorker:
+    """Base of the print workers: cancel flag, message queue and render progress"""
+
+    def __init__(self):
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.reported_page = 0
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def report_progress(self, page, total):
+        """render_pdf progress callback; stops the render once cancelled.
+
+        Pool renders report once per chunk, so progress is posted whenever
+        a PROGRESS_PAGES boundary is crossed rather than on exact multiples.
+        """
+        if self.cancel_event.is_set():
+            raise PrintCancelled()
+        if page == total or page // PROGRESS_PAGES > self.reported_page // PROGRESS_PAGES:
+            self.messages.put(('progress', page, total))
+        self.reported_page = page
+
+
+class PrintWorker(RenderWorker):
+    """Render and print a NumberingJob on a background thread.
+
+    Messages put on self.messages:
+        ('progress', pages_done, total_pages)
+        ('spooling', path)
+        ('done', path)
+        ('failed', path, error message)
+        ('cancelled',)
+        ('error', error message)    -- the PDF could not be created
+    """
+
+    def __init__(self, job, printer=None):
+        super().__init__()
+        self.job = job
+        self.printer = printer
+        self.temp_path = os.path.join(tempfile.gettempdir(), f"temp_print_{uuid.uuid4().hex[:8]}.pdf")
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        try:
+            with span("print.render"):
+                self.job.render_pdf(self.temp_path, progress=self.report_progress, workers=None)
+        except PrintCancelled:
+            self.remove_temp_file()
+            self.messages.put(('cancelled',))
+            return
+        except Exception as e:
+            self.remove_temp_file()
+            self.messages.put(('error', str(e)))
+            return
+
+        self.messages.put(('spooling', self.temp_path))
+        try:
+            with span("print.submit"):
+                print_success, print_error_msg = send_to_printer(self.temp_path, self.cancel_event, self.printer)
+        except PrintCancelled:
+            self.remove_temp_file()
+            self.messages.put(('cancelled',))
+            return
+        except subprocess.TimeoutExpired:
+            print_success, print_error_msg = False, "Print operation timed out"
+        except Exception as print_error:
+            print_success, print_error_msg = False, str(print_error)
+
+        if print_success:
+            self.messages.put(('done', self.temp_path))
+        else:
+            self.messages.put(('failed', self.temp_path, print_error_msg))
+
+    def remove_temp_file(self):
+        try:
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+        except OSError:
+            pass
+
+
+class PdfExportWorker(RenderWorker):
+    """Render a NumberingJob to a chosen PDF file on a background thread.
+
+    Messages put on self.messages:
+        ('progress', pages_done, total_pages)
+        ('done', path)
+        ('cancelled',)
+        ('error', error message)
+    """
+
+    def __init__(self, job, path):
+        super().__init__()
+        self.job = job
+        self.path = path
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        try:
+            with span("pdf.export"):
+                self.job.render_pdf(self.path, progress=self.report_progress, workers=None)
+        except PrintCancelled:
+            self.messages.put(('cancelled',))
+            return
+        except Exception as e:
+            self.messages.put(('error', str(e)))
+            return
+        self.messages.put(('done', self.path))
+
+
+class SpoolWorker(RenderWorker):
+    """Print a large job as a series of N-page PDFs.
+
+    A render thread writes one chunk at a time and a submit thread sends
+    each chunk to the printer as soon as it is rendered, so rendering and
+    printing overlap. Collated copies resend the chunk files once the
+    first set is through; uncollated copies are inside each chunk. Every
+    submission keeps its own status so a failed one can be resubmitted
+    alone.
+
+    Messages put on self.messages:
+        ('progress', pages_done, total_pages)
+        ('chunk', index, status, error message)
+        ('done', failed chunk count)
+        ('cancelled',)
+        ('error', error message)
+    """
+
+    def __init__(self, job, chunk_pages=SPOOL_CHUNK_PAGES, printer=None):
+        super().__init__()
+        self.job = NumberingJob.from_dict(job.to_dict())
+        self.printer = printer
+        self.copies = max(self.job.copies, 1)
+        if self.job.collate:
+            # Whole sets are sent again from the same files
+            self.job.copies = 1
+        else:
+            self.copies = 1
+        # Each retry can be cancelled on its own without reviving the job
+        self.retry_events = []
+        self.spool_dir = tempfile.mkdtemp(prefix="numbering_spool_")
+        # One entry per submission; collated copies share the rendered file
+        self.chunks = []
+        for copy in range(1, self.copies + 1):
+            for index, first in enumerate(range(1, self.job.total + 1, chunk_pages)):
+                self.chunks.append({
+                    'copy': copy,
+                    'first': first,
+                    'last': min(first + chunk_pages - 1, self.job.total),
+                    'path': os.path.join(self.spool_dir, f"chunk_{index + 1:04d}.pdf"),
+                    'status': 'pending',
+                    'error': ''
+                })
+        self.set_size = len(self.chunks) // self.copies
+        self.submit_queue = queue.Queue()
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.submit_thread = threading.Thread(target=self.submit_chunks, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        self.submit_thread.start()
+
+    def cancel(self):
+        self.cancel_event.set()
+        for retry_event in self.retry_events:
+            retry_event.set()
+
+    def set_status(self, index, status, error=''):
+        self.chunks[index]['status'] = status
+        self.chunks[index]['error'] = error
+        self.messages.put(('chunk', index, status, error))
+
+    def run(self):
+        """Render thread: write each chunk and queue it for the printer"""
+        try:
+            for index in range(self.set_size):
+                chunk = self.chunks[index]
+                self.set_status(index, 'rendering')
+                with span("print.render"):
+                    self.job.render_pdf(chunk['path'], progress=self.report_progress, workers=None, first=chunk['first'], last=chunk['last'])
+                self.set_status(index, 'rendered')
+                self.submit_queue.put(index)
+            for index in range(self.set_size, len(self.chunks)):
+                self.submit_queue.put(index)
+        except PrintCancelled:
+            pass
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.submit_queue.put(None)
+
+    def submit_chunks(self):
+        """Submit thread: send rendered chunks in order until the render thread is done"""
+        while True:
+            index = self.submit_queue.get()
+            if index is None:
+                break
+            if self.cancel_event.is_set():
+                continue
+            self.submit_chunk(index)
+        self.thread.join()
+        if self.error is not None:
+            self.messages.put(('error', self.error))
+        elif self.cancel_event.is_set():
+            self.messages.put(('cancelled',))
+        else:
+            self.messages.put(('done', sum(1 for chunk in self.chunks if chunk['status'] == 'failed')))
+
+    def submit_chunk(self, index, cancel_event=None):
+        self.set_status(index, 'printing')
+        try:
+            with span("print.submit"):
+                print_success, print_error_msg = send_to_printer(self.chunks[index]['path'], cancel_event or self.cancel_event, self.printer)
+        except PrintCancelled:
+            self.set_status(index, 'failed', "Cancelled")
+            return
+        except subprocess.TimeoutExpired:
+            print_success, print_error_msg = False, "Print operation timed out"
+        except Exception as print_error:
+            print_success, print_error_msg = False, str(print_error)
+        if print_success:
+            self.set_status(index, 'printed')
+        else:
+            self.set_status(index, 'failed', print_error_msg or "Printing failed")
+
+    def resubmit(self, index):
+        """Send one chunk file to the printer again on its own thread.
+
+        The retry gets its own cancel event: the job's event stays set after
+        a Cancel so a render thread that is still finishing its page stops.
+        """
+        retry_event = threading.Event()
+        self.retry_events.append(retry_event)
+        threading.Thread(target=self.submit_chunk, args=(index, retry_event), daemon=True).start()
+
+    def remove_files(self):
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
@@ -0,0 +1,137 @@
+"""Opt-in timing of the preview, PDF, print and image export stages.
+
+Code under measurement wraps each stage in ``with span("pdf.pages"):``.
+While the profiler is disabled (the default) span() hands back one shared
+do-nothing context manager, so instrumented code costs a function call
+per stage and nothing else. When enabled, every span adds to the per-stage
+count and timings and is kept as a Chrome trace event, which dump_trace()
+writes for chrome://tracing or Perfetto.
+
+Spans are recorded in the process that runs them; pool workers are timed
+from the parent as the wait for each chunk.
+"""
+import json
+import os
+import threading
+import time
+
+# Trace events kept in memory; stage totals keep counting after this
+MAX_TRACE_EVENTS = 200000
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+
+class Profiler:
+    """Span timings per stage name, collected from any thread"""
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter_ns()
+        self.stats = {}
+        self.events = []
+        self.dropped = 0
+
+    def enable(self, enabled=True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self.lock:
+            self.origin = time.perf_counter_ns()
+            self.stats = {}
+            self.events = []
+            self.dropped = 0
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, start, end):
+        duration = end - start
+        with self.lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                self.stats[name] = [1, duration, duration, duration]
+            else:
+                stat[0] += 1
+                stat[1] += duration
+                stat[2] = min(stat[2], duration)
+                stat[3] = max(stat[3], duration)
+            if len(self.events) < MAX_TRACE_EVENTS:
+                self.events.append((name, start, duration, threading.get_ident()))
+            else:
+                self.dropped += 1
+
+    def summary(self):
+        """(stage, count, total ms, mean ms, min ms, max ms) rows, slowest total first"""
+        with self.lock:
+            stats = [(name, list(stat)) for name, stat in self.stats.items()]
+        rows = [(name, count, total / 1e6, total / count / 1e6, low / 1e6, high / 1e6)
+                for name, (count, total, low, high) in stats]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+
+    def chrome_trace(self):
+        """Trace Event Format dict with one complete ("X") event per span"""
+        pid = os.getpid()
+        with self.lock:
+            events = list(self.events)
+            origin = self.origin
+            dropped = self.dropped
+        trace_events = [{
+            'name': name,
+            'cat': name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': (start - origin) / 1000,
+            'dur': duration / 1000,
+            'pid': pid,
+            'tid': tid
+        } for name, start, duration, tid in events]
+        stages = {row[0]: {'count': row[1], 'total_ms': row[2], 'mean_ms': row[3], 'min_ms': row[4], 'max_ms': row[5]}
+                  for row in self.summary()}
+        return {
+            'traceEvents': trace_events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'dropped_events': dropped},
+            'stages': stages
+        }
+
+    def dump_trace(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f)
+
+
+profiler = Profiler()
+
+
+def span(name):
+    """Context manager timing one stage, or a no-op while profiling is off"""
+    return profiler.span(name)
@@ -0,0 +1,231 @@
+"""Numbering project files: heads, paper, numbering and the background reference.
+
+A project is saved in one of two encodings of the same versioned data:
+
+* JSON (PROJECT_EXTENSION): compact text where every head only stores
+  the fields that differ from new_head(), so it stays readable and diffs
+  well.
+* Binary (BINARY_PROJECT_EXTENSION): a short header, then one JSON block
+  with the settings, the head field table and a string table, then one
+  fixed-size struct row per head. Only fields that some head changes get
+  a column, and a column keeps its values' exact types. Loading a
+  template with hundreds of heads is a single struct.iter_unpack over
+  the rows.
+
+The background image is stored as a reference, relative to the project
+file when it sits next to or below it. Plain layout JSON written by
+save_layout() loads as well.
+"""
+import json
+import os
+import struct
+
+from numbering_engine import NumberingJob, new_head
+
+PROJECT_FORMAT = "numbering-project"
+PROJECT_VERSION = 1
+PROJECT_EXTENSION = ".nproj"
+BINARY_PROJECT_EXTENSION = ".nprojb"
+
+# Binary header: magic, format version, length of the settings block
+BINARY_MAGIC = b"NPRJ"
+BINARY_HEADER = struct.Struct("<4sHI")
+
+# Kinds of binary head columns; strings and other values index the string table
+BOOL_FIELD = "bool"
+INT_FIELD = "int"
+FLOAT_FIELD = "float"
+STRING_FIELD = "str"
+JSON_FIELD = "json"
+
+# Narrowest struct code for integer columns, by value range
+INT_CODES = [("b", -2 ** 7, 2 ** 7), ("h", -2 ** 15, 2 ** 15), ("i", -2 ** 31, 2 ** 31), ("q", -2 ** 63, 2 ** 63)]
+
+# Fields derived from a head's position in the list
+POSITIONAL_FIELDS = ('id',)
+
+
+def project_settings(job, path):
+    """Paper and numbering of a job, with the background path made relative to the project"""
+    data = job.to_dict()
+    background = data['paper'].get('background_image')
+    if background:
+        project_dir = os.path.dirname(os.path.abspath(path))
+        try:
+            relative = os.path.relpath(os.path.abspath(background), project_dir)
+        except ValueError:
+            # On another Windows drive; keep the absolute path
+            relative = os.path.abspath(background)
+        if not relative.startswith(os.pardir):
+            data['paper']['background_image'] = relative
+    return {
+        'format': PROJECT_FORMAT,
+        'version': PROJECT_VERSION,
+        'paper': data['paper'],
+        'numbering': data['numbering']
+    }
+
+
+def resolve_background(paper, path):
+    background = paper.get('background_image')
+    if background and not os.path.isabs(background):
+        paper['background_image'] = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(path)), background))
+
+
+def check_version(data):
+    if data.get('format') != PROJECT_FORMAT:
+        raise ValueError("Not a numbering project file")
+    if data.get('version', 0) > PROJECT_VERSION:
+        raise ValueError(f"Project version {data['version']} is newer than this program supports ({PROJECT_VERSION})")
+
+
+def head_changes(head, index):
+    """Fields of a head that differ from the defaults of a new head at the same position"""
+    defaults = new_head(index)
+    return {key: value for key, value in head.items() if key not in POSITIONAL_FIELDS and defaults.get(key, KeyError) != value}
+
+
+def save_project(job, path, binary=None):
+    """Write a project; binary defaults to the file extension"""
+    if binary is None:
+        binary = path.lower().endswith(BINARY_PROJECT_EXTENSION)
+    settings = project_settings(job, path)
+    if binary:
+        data = encode_binary(settings, job.heads)
+        with open(path, "wb") as f:
+            f.write(data)
+    else:
+        settings['heads'] = [head_changes(head, index) for index, head in enumerate(job.heads)]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(settings, f, separators=(",", ":"))
+
+
+def load_project(path):
+    """NumberingJob from a binary or JSON project, or a plain layout JSON file"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.startswith(BINARY_MAGIC):
+        settings, heads = decode_binary(data)
+    else:
+        settings = json.loads(data.decode("utf-8"))
+        if not isinstance(settings, dict):
+            raise ValueError("Not a numbering project file")
+        if 'format' in settings:
+            check_version(settings)
+        heads = []
+        for index, changes in enumerate(settings.get('heads', [])):
+            head = new_head(index)
+            head.update(changes)
+            head['id'] = index
+            heads.append(head)
+    paper = dict(settings.get('paper') or {})
+    resolve_background(paper, path)
+    return NumberingJob(heads, settings.get('numbering'), paper)
+
+
+def column_kind(values):
+    """Struct kind of a column; mixed columns go to the string table so ints stay ints"""
+    if all(type(value) is bool for value in values):
+        return BOOL_FIELD
+    if all(type(value) is int for value in values):
+        return INT_FIELD
+    if all(type(value) is float for value in values):
+        return FLOAT_FIELD
+    if all(type(value) is str for value in values):
+        return STRING_FIELD
+    return JSON_FIELD
+
+
+def struct_code(kind, values):
+    if kind == BOOL_FIELD:
+        return "?"
+    if kind == FLOAT_FIELD:
+        return "d"
+    low, high = min(values, default=0), max(values, default=0)
+    for code, minimum, limit in INT_CODES:
+        if minimum <= low and high < limit:
+            return code
+    raise ValueError(f"Value out of range: {low if low < 0 else high}")
+
+
+def indexed_fields():
+    """Head fields whose new_head() default depends on the head's position"""
+    first, second = new_head(0), new_head(1)
+    return [key for key in first if first[key] != second[key] and key not in POSITIONAL_FIELDS]
+
+
+def encode_binary(settings, heads):
+    # Only fields that differ from new_head() in some head get a column, plus the
+    # position-dependent defaults (the "Head N" name) so loading never rebuilds them
+    defaults = [new_head(index) for index in range(len(heads))]
+    fields = indexed_fields() if heads else []
+    for head, default in zip(heads, defaults):
+        fields.extend(key for key, value in head.items()
+                      if key not in POSITIONAL_FIELDS and key not in fields and default.get(key, KeyError) != value)
+    columns = [[head.get(key, default.get(key)) for head, default in zip(heads, defaults)] for key in fields]
+    kinds = [column_kind(values) for values in columns]
+
+    strings = {}
+    for kind, values in zip(kinds, columns):
+        if kind == STRING_FIELD:
+            values[:] = [strings.setdefault(value, len(strings)) for value in values]
+        elif kind == JSON_FIELD:
+            values[:] = [strings.setdefault(json.dumps(value), len(strings)) for value in values]
+    codes = [struct_code(kind, values) for kind, values in zip(kinds, columns)]
+
+    row = struct.Struct("<" + "".join(codes))
+    block = dict(settings, fields=[list(field) for field in zip(fields, kinds, codes)], head_count=len(heads), strings=list(strings))
+    block = json.dumps(block, separators=(",", ":")).encode("utf-8")
+    rows = b"".join(row.pack(*values) for values in zip(*columns)) if fields else b""
+    return BINARY_HEADER.pack(BINARY_MAGIC, PROJECT_VERSION, len(block)) + block + rows
+
+
+def decode_binary(data):
+    """(settings, heads) from a binary project"""
+    if len(data) < BINARY_HEADER.size:
+        raise ValueError("Truncated project file")
+    magic, version, block_length = BINARY_HEADER.unpack_from(data)
+    if version > PROJECT_VERSION:
+        raise ValueError(f"Project version {version} is newer than this program supports ({PROJECT_VERSION})")
+    block_end = BINARY_HEADER.size + block_length
+    settings = json.loads(data[BINARY_HEADER.size:block_end].decode("utf-8"))
+    check_version(settings)
+
+    fields = settings.pop('fields')
+    strings = settings.pop('strings')
+    head_count = settings.pop('head_count')
+    names = [key for key, _, _ in fields]
+    if not fields:
+        return settings, [new_head(index) for index in range(head_count)]
+    row = struct.Struct("<" + "".join(code for _, _, code in fields))
+    if len(data) - block_end != row.size * head_count:
+        raise ValueError("Truncated project file")
+
+    # Decode column by column: string indexes become their strings in one pass each
+    columns = list(zip(*row.iter_unpack(data[block_end:])))
+    for i, (_, kind, _) in enumerate(fields):
+        if kind == STRING_FIELD:
+            columns[i] = [strings[key] for key in columns[i]]
+        elif kind == JSON_FIELD:
+            # All distinct values in one parse; immutable ones are shared between heads
+            keys = list(set(columns[i]))
+            values = json.loads("[" + ",".join(strings[key] for key in keys) + "]")
+            shared = {key: value for key, value in zip(keys, values) if not isinstance(value, (list, dict))}
+            columns[i] = [shared[key] if key in shared else json.loads(strings[key]) for key in columns[i]]
+
+    # Heads start as copies of one default head, so fields without a column (or
+    # added after the file was written) keep their defaults. Position-dependent
+    # defaults are only rebuilt per head for files that did not store them.
+    base = new_head(0)
+    indexed = [key for key in indexed_fields() if key not in names]
+    heads = []
+    for index, values in enumerate(zip(*columns)):
+        head = base.copy()
+        head['id'] = index
+        if indexed:
+            default = new_head(index)
+            for key in indexed:
+                head[key] = default[key]
+        head.update(zip(names, values))
+        heads.append(head)
+    return settings, heads
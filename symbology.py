@@ -0,0 +1,189 @@
+"""QR code and barcode bitmaps for the preview and the image export.
+
+The preview draws through SymbolCache; the image export calls
+make_qr_image and render_barcode_label directly and never uses the cache.
+
+qrcode and python-barcode are imported on first use, so importing this
+module does not slow down start-up.
+"""
+from collections import OrderedDict
+from itertools import groupby
+
+from PIL import Image, ImageDraw, ImageFont
+
+# barcode module class per barcode type
+BARCODE_CLASSES = {
+    'CODE128': 'Code128',
+    'CODE39': 'Code39',
+    'EAN13': 'EAN13',
+    'EAN8': 'EAN8',
+    'UPCA': 'UPCA'
+}
+
+# Quiet zone on each side of a barcode, in modules
+BARCODE_QUIET_ZONE = 6
+
+# Memory budget for cached QR/barcode bitmaps in the preview
+SYMBOL_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def make_qr_image(text):
+    import qrcode
+    qr = qrcode.QRCode(version=1, box_size=10, border=1)
+    qr.add_data(text)
+    qr.make(fit=True)
+    return qr.make_image(fill_color="black", back_color="white").get_image()
+
+
+def qr_matrix(text):
+    """QR module matrix (True = dark), including the one-module border"""
+    import qrcode
+    qr = qrcode.QRCode(version=1, box_size=10, border=1)
+    qr.add_data(text)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def dark_runs(row):
+    """(start, length) of every run of dark modules in a row"""
+    position = 0
+    for dark, run in groupby(row, lambda module: module not in (False, '0')):
+        count = len(list(run))
+        if dark:
+            yield position, count
+        position += count
+
+
+def qr_vector_ops(text):
+    """PDF rectangle operators of a QR code in module units.
+
+    The origin is the lower-left corner; returns (operators, modules per
+    side) so the caller can scale and place it with a cm transform.
+    """
+    matrix = qr_matrix(text)
+    size = len(matrix)
+    ops = []
+    for row_index, row in enumerate(matrix):
+        y = size - row_index - 1
+        ops.extend(f"{x} {y} {length} 1 re" for x, length in dark_runs(row))
+    return " ".join(ops).encode('latin-1'), size
+
+
+def barcode_vector_ops(text, barcode_type):
+    """PDF rectangle operators of barcode bars, in modules x bar height.
+
+    The quiet zone is included in the returned module count; bars are one
+    unit high so a cm transform sets the real height.
+    """
+    modules = barcode_modules(text, barcode_type)
+    ops = " ".join(f"{x + BARCODE_QUIET_ZONE} 0 {length} 1 re" for x, length in dark_runs(modules))
+    return ops.encode('latin-1'), len(modules) + 2 * BARCODE_QUIET_ZONE
+
+
+def barcode_modules(text, barcode_type):
+    """Module pattern of a barcode straight from the library ('1' = bar)"""
+    import barcode
+    barcode_class = getattr(barcode, BARCODE_CLASSES.get(barcode_type, 'Code128'))
+    return barcode_class(text).build()[0]
+
+
+def rasterize_modules(modules, module_px, height_px, quiet_zone=BARCODE_QUIET_ZONE):
+    """Bars-only bitmap of a module pattern at the target pixel size.
+
+    Bar edges are rounded from the exact module positions, so fractional
+    module widths at odd zoom levels keep the overall barcode length.
+    """
+    pattern = '0' * quiet_zone + modules + '0' * quiet_zone
+    row = []
+    position = 0
+    for bit, run in groupby(pattern):
+        count = len(list(run))
+        start = round(position * module_px)
+        position += count
+        row.append((b'\xff' if bit == '0' else b'\x00') * (round(position * module_px) - start))
+    row = b''.join(row) or b'\xff'
+    line = Image.frombytes('L', (len(row), 1), row)
+    return line.resize((len(row), max(int(height_px), 1)), Image.Resampling.NEAREST)
+
+
+def render_barcode_label(text, head, modules=None):
+    """Barcode bitmap for export: bars plus the value text when enabled"""
+    modules = modules or barcode_modules(text, head['barcode_type'])
+    bars = rasterize_modules(modules, max(head['barcode_width'], 1), max(head['barcode_height'], 10))
+    if not head['barcode_display_value']:
+        return bars.convert('1')
+    font = ImageFont.load_default()
+    left, top, right, bottom = font.getbbox(text)
+    label = Image.new('L', (max(bars.width, right - left), bars.height + head['barcode_text_space'] + bottom), 255)
+    label.paste(bars, ((label.width - bars.width) // 2, 0))
+    ImageDraw.Draw(label).text(((label.width - (right - left)) // 2 - left, bars.height + head['barcode_text_space']), text, fill=0, font=font)
+    return label.convert('1')
+
+
+def image_bytes(image):
+    """Approximate memory used by a PIL image"""
+    bits = {'1': 1, 'L': 8, 'P': 8, 'RGB': 24, 'RGBA': 32}.get(image.mode, 32)
+    return max(image.width * image.height * bits // 8, 1)
+
+
+class SymbolCache:
+    """Bounded LRU cache of generated QR and barcode bitmaps.
+
+    Entries are keyed by content and symbology parameters. Zoomed QR
+    variants are derived from the cached base image and zoomed barcodes
+    from the cached module pattern, so flipping back to a page or
+    re-zooming never re-encodes a symbol. The total size of all entries
+    is kept under max_bytes.
+    """
+
+    def __init__(self, max_bytes=SYMBOL_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, factory, size_of=image_bytes):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        value = factory()
+        size = size_of(value)
+        if size <= self.max_bytes:
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            self.evict()
+        return value
+
+    def evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            _, (_, size) = self.entries.popitem(last=False)
+            self.total_bytes -= size
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def qr(self, text):
+        return self.get(('qr', text), lambda: make_qr_image(text))
+
+    def qr_scaled(self, text, size):
+        return self.get(('qr', text, size), lambda: self.qr(text).resize((size, size), Image.Resampling.NEAREST))
+
+    def barcode_modules(self, text, barcode_type):
+        return self.get(('bc', text, barcode_type), lambda: barcode_modules(text, barcode_type), size_of=len)
+
+    def barcode_scaled(self, text, barcode_type, module_width, module_height, zoom):
+        """Bars-only barcode rasterized directly at the zoomed size.
+
+        module_width is the bar module width and module_height the bar
+        height in preview pixels; the result is at least 10px each way.
+        """
+        def rasterize():
+            modules = self.barcode_modules(text, barcode_type)
+            module_px = max(module_width * zoom, 10 / (len(modules) + 2 * BARCODE_QUIET_ZONE))
+            return rasterize_modules(modules, module_px, max(int(module_height * zoom), 10))
+        return self.get(('bc', text, barcode_type, module_width, module_height, zoom), rasterize)